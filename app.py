@@ -5,7 +5,13 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import DB
-from backend.data.scan_database import init_db
+from backend.auth.principal import principal_cache
+from backend.data.scan_database import dispose_async_engine, init_db
+from backend.modules.scan_jobs import scan_jobs
+from backend.modules.mri_executor import mri_executor
+from backend.modules.model_registry import registry
+from backend.modules.result_cache import result_cache
+from backend.utils.file_handler import upload_limit_middleware, upload_stats
 
 # Import Routers
 from backend.routes import (
@@ -14,6 +20,7 @@ from backend.routes import (
     patient_router,
     doctor_router,
     auth_router,   # ✅ ADD AUTH
+    volumes,
 )
 from backend.models.chatbot import router as chatbot_router
 from backend.routes.predict_xray import router as xray_router
@@ -39,8 +46,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor",
+        "Content-Range",
+        "X-Volume-Shape",
+        "X-Volume-Spacing",
+        "X-Volume-Dtype",
+        "X-Volume-Scale",
+        "X-Volume-Offset",
+        "X-Region-Shape",
+    ],
 )
 
+# Reject oversized uploads from Content-Length before the body is read
+app.middleware("http")(upload_limit_middleware)
+
 # ============================================================
 # 2. API Routers
 # ============================================================
@@ -60,6 +80,7 @@ app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"]
 app.include_router(scans.router, prefix="/api/scans", tags=["Scans"])
 app.include_router(patient_router.router, prefix="/api/patients", tags=["Patients"])
 app.include_router(doctor_router.router, prefix="/api/doctors", tags=["Doctors"])
+app.include_router(volumes.router, prefix="/api/volumes", tags=["Volumes"])
 
 # ============================================================
 # 3. Static Files
@@ -79,9 +100,50 @@ app.mount(
 async def root():
     return {"message": "InsightX Server is running."}
 
+
+@app.get("/health/models")
+async def model_health():
+    # Readiness: every registered model loaded and warmed up
+    return registry.status()
+
+
+@app.get("/health/result-cache")
+async def result_cache_stats():
+    # Hit/miss counters and disk usage of the duplicate-upload cache
+    return result_cache.stats()
+
+
+@app.get("/health/auth-cache")
+async def auth_cache_stats():
+    # Hit rate of the token -> principal cache behind get_current_user
+    return principal_cache.stats()
+
+
+@app.get("/health/uploads")
+async def upload_throughput():
+    # Upload counts, rejections and mean streaming throughput
+    return upload_stats.snapshot()
+
 # ============================================================
 # 5. Startup
 # ============================================================
 @app.on_event("startup")
 def startup():
     init_db()
+    registry.warm_up_in_background()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    # Let in-flight predictions finish before the worker exits
+    scan_jobs.shutdown(
+        timeout=float(os.getenv("SCAN_JOB_DRAIN_TIMEOUT", "60")),
+        on_cancelled=scans.fail_cancelled_scans,
+    )
+    mri_executor.shutdown()
+    registry.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await dispose_async_engine()
@@ -0,0 +1,101 @@
+# backend/auth/principal.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+AUTH_PRINCIPAL_TTL = float(os.getenv("AUTH_PRINCIPAL_TTL", "60"))          # seconds
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", "1024"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Who is calling: the identity and role fields of a User, detached from any session."""
+
+    id: int
+    role: str
+    email: str
+    full_name: str
+    doctor_id: Optional[int] = None
+    patient_id: Optional[int] = None
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            role=user.role,
+            email=user.email,
+            full_name=user.full_name,
+            doctor_id=user.doctor_id,
+            patient_id=user.patient_id,
+        )
+
+
+class PrincipalCache:
+    """
+    Bounded TTL cache of user id -> Principal, so authenticated requests do
+    not query the users table just to identify the caller. Least recently
+    used entries are dropped past `max_entries`.
+
+    Invalidation is per process; with several server workers a change made
+    through another worker is picked up within `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() < entry[1]:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, principal: Principal) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[principal.id] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Drops one user (after a password or profile change), or everyone."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "ttl_seconds": self.ttl,
+            "max_entries": self.max_entries,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+principal_cache = PrincipalCache(ttl=AUTH_PRINCIPAL_TTL, max_entries=AUTH_PRINCIPAL_CACHE_SIZE)
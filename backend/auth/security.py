@@ -1,11 +1,34 @@
 # backend/auth/security.py
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
 from passlib.context import CryptContext
 from jose import jwt
 
-# ✅ Use PBKDF2 (stable on Windows, no bcrypt backend/version issues, no 72-byte limit)
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# PBKDF2 cost; stored hashes below it are upgraded on the next successful login
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+# Concurrent hash/verify operations; the rest wait without holding request threads
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+
+
+def make_context(rounds: int = PASSWORD_HASH_ROUNDS) -> CryptContext:
+    # ✅ Use PBKDF2 (stable on Windows, no bcrypt backend/version issues, no 72-byte limit)
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+    )
+
+
+pwd_context = make_context()
+
+# hashlib's PBKDF2 releases the GIL, so these threads hash in parallel
+_hash_executor = ThreadPoolExecutor(
+    max_workers=max(1, PASSWORD_HASH_WORKERS), thread_name_prefix="password-hash"
+)
 
 JWT_SECRET = os.getenv("JWT_SECRET", "CHANGE_ME_IN_PROD")
 JWT_ALG = "HS256"
@@ -23,6 +46,25 @@ def verify_password(password: str, password_hash: str) -> bool:
     return pwd_context.verify(password, password_hash)
 
 
+def verify_and_update(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """(valid, replacement hash or None); a replacement is returned when the stored cost is outdated."""
+    password = password.strip()
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the bounded hashing pool, off the event loop and request threadpool."""
+    return await asyncio.wrap_future(_hash_executor.submit(hash_password, password))
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    return await asyncio.wrap_future(_hash_executor.submit(verify_password, password, password_hash))
+
+
+async def verify_and_update_async(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    return await asyncio.wrap_future(_hash_executor.submit(verify_and_update, password, password_hash))
+
+
 def create_access_token(payload: dict) -> str:
     exp = datetime.utcnow() + timedelta(minutes=JWT_EXPIRES_MIN)
     to_encode = {**payload, "exp": exp}
@@ -1,13 +1,144 @@
 import os
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./insightx.db")
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+# -----------------------
+# Engine profile
+# -----------------------
+# SQLite: WAL lets dashboard readers run while upload jobs write
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")   # durable with WAL, fewer fsyncs
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256"))
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Server databases (Postgres, MySQL, ...)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))      # seconds; -1 disables
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes")
+
+
+def sqlite_pragmas(url: str) -> list:
+    """PRAGMA statements run on every new SQLite connection."""
+    pragmas = [
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size={-SQLITE_CACHE_MB * 1024}",  # negative = KiB
+        f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}",
+    ]
+    # In-memory databases cannot use WAL
+    if ":memory:" not in url and "mode=memory" not in url:
+        pragmas.insert(0, f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    return pragmas
+
+
+def _install_sqlite_pragmas(sync_engine: Engine, url: str) -> None:
+    pragmas = sqlite_pragmas(url)
+
+    @event.listens_for(sync_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def build_engine(url: str = DATABASE_URL, tuned: bool = True) -> Engine:
+    """
+    Engine for `url`. tuned=False gives the plain create_engine defaults,
+    kept for comparison in benchmarks/bench_db_concurrency.py.
+    """
+    if url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False}
+        if not tuned:
+            return create_engine(url, connect_args=connect_args)
+
+        connect_args["timeout"] = SQLITE_BUSY_TIMEOUT_MS / 1000
+        sqlite_engine = create_engine(url, connect_args=connect_args)
+        _install_sqlite_pragmas(sqlite_engine, url)
+        return sqlite_engine
+
+    if not tuned:
+        return create_engine(url)
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+
+engine = build_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+# -----------------------
+# Async engine (hot read endpoints)
+# -----------------------
+# Sync URL scheme -> async driver; override with ASYNC_DATABASE_URL
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    scheme, sep, rest = url.partition("://")
+    base = scheme.split("+", 1)[0]
+    return _ASYNC_DRIVERS.get(base, scheme) + sep + rest
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    """
+    Created on first use so the sync-only tools (seed_data, training) never
+    need the async driver (aiosqlite / asyncpg) installed.
+    """
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+        if ASYNC_DATABASE_URL.startswith("sqlite"):
+            async_engine = create_async_engine(
+                ASYNC_DATABASE_URL,
+                connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+            )
+            _install_sqlite_pragmas(async_engine.sync_engine, ASYNC_DATABASE_URL)
+        else:
+            async_engine = create_async_engine(
+                ASYNC_DATABASE_URL,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_pre_ping=DB_POOL_PRE_PING,
+            )
+
+        _AsyncSessionLocal = sessionmaker(
+            bind=async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        _async_engine = async_engine
+    return _async_engine
+
+
 Base = declarative_base()
 
 def _ensure_scan_columns() -> None:
@@ -53,3 +184,15 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """AsyncSession dependency: the request waits on the database, not on a threadpool slot."""
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    if _async_engine is not None:
+        await _async_engine.dispose()
@@ -0,0 +1,152 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable, List
+
+import torch
+
+
+class MicroBatcher:
+    """
+    Collects single-sample inference requests arriving within a short window
+    and runs them through the model as one batched forward pass.
+
+    infer_fn: takes a (N, C, H, W) tensor and returns a tensor whose first
+              dimension is N (one output row per input sample).
+    """
+
+    def __init__(
+        self,
+        infer_fn: Callable[[torch.Tensor], torch.Tensor],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        name: str = "batcher",
+    ):
+        self.infer_fn = infer_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.name = name
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._histogram: Counter = Counter()
+        self._requests = 0
+        self._batches = 0
+        self._busy_seconds = 0.0
+        self._thread = None
+
+    # -----------------------
+    # Public API
+    # -----------------------
+    def submit(self, sample: torch.Tensor) -> Future:
+        """
+        Queues one sample (C, H, W) and returns a Future resolving to its
+        output row.
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((sample, future))
+        return future
+
+    def infer(self, sample: torch.Tensor) -> torch.Tensor:
+        """Blocking helper: submit a sample and wait for its output row."""
+        return self.submit(sample).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            batches = self._batches
+            return {
+                "name": self.name,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "requests": self._requests,
+                "batches": batches,
+                "mean_batch_size": round(self._requests / batches, 3) if batches else 0.0,
+                "mean_batch_latency_ms": (
+                    round(1000 * self._busy_seconds / batches, 3) if batches else 0.0
+                ),
+                "batch_size_histogram": {
+                    str(size): count for size, count in sorted(self._histogram.items())
+                },
+                "queue_depth": self._queue.qsize(),
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._histogram.clear()
+            self._requests = 0
+            self._batches = 0
+            self._busy_seconds = 0.0
+
+    # -----------------------
+    # Worker loop
+    # -----------------------
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{self.name}-worker", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            samples = [sample for sample, _ in batch]
+            futures = [future for _, future in batch]
+
+            started = time.perf_counter()
+            try:
+                with torch.no_grad():
+                    outputs = self.infer_fn(torch.stack(samples, dim=0))
+            except Exception as exc:
+                for future in futures:
+                    future.set_exception(exc)
+                continue
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self._histogram[len(batch)] += 1
+                    self._requests += len(batch)
+                    self._batches += 1
+                    self._busy_seconds += elapsed
+
+            if len(outputs) != len(futures):
+                exc = RuntimeError(
+                    f"{self.name}: infer_fn returned {len(outputs)} rows for a batch of {len(futures)}"
+                )
+                for future in futures:
+                    future.set_exception(exc)
+                continue
+
+            for row, future in zip(outputs, futures):
+                future.set_result(row)
+
+
+def batcher_settings(prefix: str, default_size: int = 8, default_wait_ms: float = 10.0) -> dict:
+    """
+    Reads <PREFIX>_BATCH_MAX_SIZE / <PREFIX>_BATCH_MAX_WAIT_MS from the environment.
+    """
+    return {
+        "max_batch_size": int(os.getenv(f"{prefix}_BATCH_MAX_SIZE", str(default_size))),
+        "max_wait_ms": float(os.getenv(f"{prefix}_BATCH_MAX_WAIT_MS", str(default_wait_ms))),
+    }
@@ -0,0 +1,223 @@
+import os
+import posixpath
+import threading
+import zipfile
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pydicom
+
+# ==========================================
+# CONFIG
+# ==========================================
+# Most pixel codecs (and zlib for deflated ZIP members) release the GIL,
+# so threads scale well; "process" is available for pure-Python codecs.
+DICOM_IO_WORKERS = int(os.getenv("DICOM_IO_WORKERS", str(min(8, os.cpu_count() or 1))))
+DICOM_IO_EXECUTOR = os.getenv("DICOM_IO_EXECUTOR", "thread")
+
+
+# ==========================================
+# SOURCES
+# ==========================================
+# A source is a picklable reference to one DICOM file:
+#   ("file", path)  or  ("zip", zip_path, member_name)
+_local = threading.local()
+
+
+def _open_source(ref):
+    if ref[0] == "file":
+        return open(ref[1], "rb")
+
+    # One ZipFile handle per thread (and per process), so the central
+    # directory is parsed once per worker rather than once per member.
+    archives = getattr(_local, "archives", None)
+    if archives is None:
+        archives = _local.archives = {}
+    zf = archives.get(ref[1])
+    if zf is None:
+        zf = archives[ref[1]] = zipfile.ZipFile(ref[1], "r")
+    return zf.open(ref[2])
+
+
+def is_valid_dicom_file(path: str) -> bool:
+    name = os.path.basename(path)
+    return (os.path.isfile(path) and name.lower().endswith(".dcm") and
+            not name.startswith("._") and "__MACOSX" not in path)
+
+
+def is_valid_dicom_member(info: zipfile.ZipInfo) -> bool:
+    name = posixpath.basename(info.filename)
+    return (not info.is_dir() and name.lower().endswith(".dcm") and
+            not name.startswith("._") and "__MACOSX" not in info.filename)
+
+
+# ==========================================
+# WORKER TASKS
+# ==========================================
+def _slice_position(ds) -> float:
+    return float(ds.ImagePositionPatient[2]) if "ImagePositionPatient" in ds else float(ds.InstanceNumber)
+
+
+def _read_header(ref):
+    """
+    Header-only read (no pixel data). Returns None for unreadable files.
+    """
+    try:
+        with _open_source(ref) as fp:
+            ds = pydicom.dcmread(fp, stop_before_pixels=True, force=True)
+        return {
+            "ref": ref,
+            "uid": ds.SeriesInstanceUID,
+            "z": _slice_position(ds),
+            "shape": (int(ds.Rows), int(ds.Columns)),
+            "pixel_spacing": getattr(ds, "PixelSpacing", [1.0, 1.0]),
+            "slice_thickness": getattr(ds, "SliceThickness", 1.0),
+        }
+    except Exception:
+        return None
+
+
+def _read_pixels(ref):
+    try:
+        with _open_source(ref) as fp:
+            ds = pydicom.dcmread(fp, force=True)
+        return ds.pixel_array
+    except Exception:
+        return None
+
+
+# ==========================================
+# PIPELINE
+# ==========================================
+def _make_executor(workers: int, kind: str):
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dicom-io")
+
+
+def _index_series(refs, executor):
+    """
+    Header pass: groups headers by SeriesInstanceUID without decoding pixels.
+    """
+    series_map = defaultdict(list)
+    for header in executor.map(_read_header, refs, chunksize=16):
+        if header is not None:
+            series_map[header["uid"]].append(header)
+
+    if not series_map:
+        raise ValueError("No readable DICOM series found.")
+    return series_map
+
+
+def _decode_into_volume(headers, executor, threaded: bool):
+    """
+    Pixel pass for the chosen series only. Slices are decoded in parallel and
+    written straight into a preallocated float32 volume in slice order;
+    slices sharing a position are averaged. All headers must share one shape.
+    """
+    rows, cols = headers[0]["shape"]
+
+    sorted_zs = sorted({h["z"] for h in headers})
+    z_index = {z: i for i, z in enumerate(sorted_zs)}
+
+    volume = np.zeros((len(sorted_zs), rows, cols), dtype=np.float32)
+    counts = np.zeros(len(sorted_zs), dtype=np.int32)
+    lock = threading.Lock()
+
+    def store(idx, pixels):
+        if pixels is None or pixels.shape != (rows, cols):
+            return
+        with lock:
+            if counts[idx] == 0:
+                volume[idx] = pixels
+            else:
+                volume[idx] += pixels
+            counts[idx] += 1
+
+    if threaded:
+        # Decode and store on the worker threads; nothing is buffered
+        def task(header):
+            store(z_index[header["z"]], _read_pixels(header["ref"]))
+
+        list(executor.map(task, headers))
+    else:
+        refs = [h["ref"] for h in headers]
+        for header, pixels in zip(headers, executor.map(_read_pixels, refs, chunksize=8)):
+            store(z_index[header["z"]], pixels)
+
+    if not counts.any():
+        raise ValueError("No decodable DICOM slices found.")
+
+    keep = counts > 0
+    if not keep.all():
+        volume = volume[keep]
+        counts = counts[keep]
+        sorted_zs = [z for z, k in zip(sorted_zs, keep) if k]
+    duplicates = counts > 1
+    if duplicates.any():
+        volume[duplicates] /= counts[duplicates, None, None]
+
+    return volume, sorted_zs
+
+
+def _load_series(refs, workers: int = None, executor_kind: str = None):
+    workers = max(1, workers or DICOM_IO_WORKERS)
+    executor_kind = executor_kind or DICOM_IO_EXECUTOR
+    threaded = executor_kind != "process"
+
+    # Per-thread ZipFile handles are released when the pool's threads exit
+    with _make_executor(workers, executor_kind) as executor:
+        series_map = _index_series(refs, executor)
+        series_uid = max(series_map, key=lambda k: len(series_map[k]))
+        # Reference shape is the most common one, so a localizer or other
+        # outlier slice listed first does not discard the real series
+        shape = Counter(h["shape"] for h in series_map[series_uid]).most_common(1)[0][0]
+        headers = [h for h in series_map[series_uid] if h["shape"] == shape]
+        volume, sorted_zs = _decode_into_volume(headers, executor, threaded)
+
+    first = headers[0]
+    pixel_spacing = first["pixel_spacing"]
+    dz = np.abs(np.diff(sorted_zs)).mean() if len(sorted_zs) > 1 else first["slice_thickness"]
+
+    spacing = (float(dz), float(pixel_spacing[0]), float(pixel_spacing[1]))
+
+    # Normalize to [0, 1] in place
+    vmin, vmax = float(volume.min()), float(volume.max())
+    volume -= vmin
+    volume /= (vmax - vmin + 1e-8)
+
+    return volume, spacing, series_uid, len(series_map)
+
+
+def load_dicom_series(dicom_root: str, workers: int = None, executor_kind: str = None):
+    dicom_files = []
+    for root, _, files in os.walk(dicom_root):
+        for f in files:
+            full_path = os.path.join(root, f)
+            if is_valid_dicom_file(full_path):
+                dicom_files.append(("file", full_path))
+
+    if not dicom_files:
+        raise ValueError("No DICOM files found.")
+
+    return _load_series(dicom_files, workers, executor_kind)
+
+
+def load_dicom_series_from_zip(zip_path: str, workers: int = None, executor_kind: str = None):
+    """
+    Same as load_dicom_series, but reads members straight out of the archive
+    as file-like objects: nothing is extracted to disk, __MACOSX/._* entries
+    are never opened, and only the chosen series is decoded with pixels.
+    """
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        members = [
+            ("zip", zip_path, info.filename)
+            for info in zf.infolist()
+            if is_valid_dicom_member(info)
+        ]
+
+    if not members:
+        raise ValueError("No DICOM files found.")
+
+    return _load_series(members, workers, executor_kind)
@@ -1,21 +1,54 @@
-import numpy as np
-import matplotlib.pyplot as plt
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
 import torch
-import torch.nn.functional as F
+from PIL import Image
 
-def generate_grad_cam_heatmap(
-    model: torch.nn.Module,
-    input_tensor: torch.Tensor,
-    output_path: str,
-    slice_axis: int = 0
-):
+# -----------------------
+# Config
+# -----------------------
+HEATMAP_SIZE = int(os.getenv("HEATMAP_SIZE", "750"))            # longest edge in pixels
+HEATMAP_FORMAT = os.getenv("HEATMAP_FORMAT", "png").lower()      # png | webp
+HEATMAP_COLORMAP = os.getenv("HEATMAP_COLORMAP", "jet").lower()  # jet | viridis
+HEATMAP_WEBP_QUALITY = int(os.getenv("HEATMAP_WEBP_QUALITY", "90"))
+
+# Multi-channel features: the normalising max is taken on every Nth voxel per
+# axis instead of averaging the whole volume (display scale only)
+_SCALE_STRIDE = 4
+
+
+def _jet_lut() -> np.ndarray:
+    # Piecewise-linear channel ramps of the classic "jet" map
+    x = np.linspace(0.0, 1.0, 256)
+    red = np.interp(x, [0, 0.35, 0.66, 0.89, 1], [0, 0, 1, 1, 0.5])
+    green = np.interp(x, [0, 0.125, 0.375, 0.64, 0.91, 1], [0, 0, 1, 1, 0, 0])
+    blue = np.interp(x, [0, 0.11, 0.34, 0.65, 1], [0.5, 1, 1, 0, 0])
+    return np.round(np.stack([red, green, blue], axis=1) * 255).astype(np.uint8)
+
+
+def _viridis_lut() -> np.ndarray:
+    # Interpolated between nine evenly spaced reference stops of viridis
+    stops = ["440154", "472c7a", "3b518b", "2c718e", "21908d", "27ad81", "5cc863", "aadc32", "fde725"]
+    rgb = np.array([[int(h[i:i + 2], 16) for i in (0, 2, 4)] for h in stops], dtype=np.float64)
+    x = np.linspace(0.0, 1.0, 256)
+    xp = np.linspace(0.0, 1.0, len(stops))
+    return np.round(np.stack([np.interp(x, xp, rgb[:, c]) for c in range(3)], axis=1)).astype(np.uint8)
+
+
+# 256-entry RGB lookup tables, built once at import
+COLORMAPS = {"jet": _jet_lut(), "viridis": _viridis_lut()}
+
+def forward_with_features(model: torch.nn.Module, input_tensor: torch.Tensor):
     """
-    model: Your 3D U-Net model
-    input_tensor: The 5D tensor (1, 1, D, H, W) used for reconstruction
+    Runs the 3D U-Net and returns (output, final-layer features).
     """
     model.eval()
-    
+
+    if getattr(model, "outputs_features", False):
+        # Exported graphs (ONNX Runtime) return the final-layer features directly
+        return model(input_tensor)
+
     # 1. Hook into the last convolutional layer
     features = []
     def hook_feature(module, input, output):
@@ -24,41 +57,101 @@ def generate_grad_cam_heatmap(
     handle = model.final.register_forward_hook(hook_feature)
 
     # 2. Forward pass to get features
-    output = model(input_tensor)
+    with torch.no_grad():
+        output = model(input_tensor)
     handle.remove()
+    return output, features[0]
+
+
+def render_heatmap(
+    final_features,
+    output_path: str = None,
+    slice_axis: int = 0,
+    size: int = None,
+    image_format: str = None,
+    colormap: str = None,
+) -> np.ndarray:
+    """
+    final_features: final-layer activations (tensor or array), any of
+    (1, C, D, H, W), (C, D, H, W) or (D, H, W)
+    Returns the (H, W, 3) uint8 RGB slice image, also written to output_path
+    when one is given. size / image_format / colormap default to
+    HEATMAP_SIZE, HEATMAP_FORMAT and HEATMAP_COLORMAP.
 
-    # 3. Calculate heatmap from feature maps
-    feature_map = features[0].detach().cpu().squeeze() 
-    if len(feature_map.shape) == 4:
-        heatmap_3d = torch.mean(feature_map, dim=0).numpy()
+    Only the displayed slice is averaged over channels and normalised; the
+    volume is read once more for the global max (exact for one channel,
+    strided for several).
+    """
+    # 3. Channel-first view of the features without copying them
+    if isinstance(final_features, torch.Tensor):
+        final_features = final_features.detach().cpu().numpy()
+    feature_map = np.squeeze(final_features)
+    if feature_map.ndim == 2:
+        feature_map = feature_map[None, None]
+    elif feature_map.ndim == 3:
+        feature_map = feature_map[None]
+
+    # 4. Global scale: max of the ReLU'd channel mean
+    if feature_map.shape[0] == 1:
+        peak = float(feature_map.max())
     else:
-        heatmap_3d = feature_map.numpy()
-
-    # 4. Normalize the heatmap
-    heatmap_3d = np.maximum(heatmap_3d, 0)
-    heatmap_3d /= (np.max(heatmap_3d) + 1e-8)
-
-    # 5. Extract the slice for visualization 
-    if len(heatmap_3d.shape) == 3:
-        slice_index = heatmap_3d.shape[slice_axis] // 2
-        if slice_axis == 0:
-            heatmap_2d = heatmap_3d[slice_index, :, :]
-        elif slice_axis == 1:
-            heatmap_2d = heatmap_3d[:, slice_index, :]
-        else:
-            heatmap_2d = heatmap_3d[:, :, slice_index]
+        step = _SCALE_STRIDE
+        peak = float(feature_map[:, ::step, ::step, ::step].mean(axis=0).max())
+    peak = np.float32(max(peak, 0.0)) + np.float32(1e-8)
+
+    # 5. Extract the middle slice, then reduce and normalise just that plane
+    slice_index = feature_map.shape[1 + slice_axis] // 2
+    plane = np.take(feature_map, slice_index, axis=1 + slice_axis)
+    heatmap_2d = plane[0] if plane.shape[0] == 1 else plane.mean(axis=0)
+    heatmap_2d = np.maximum(heatmap_2d, 0) / peak
+
+    # 6. Bilinear upscale (longest edge = size), then colour through the LUT
+    size = size or HEATMAP_SIZE
+    h, w = heatmap_2d.shape
+    scale = size / max(h, w)
+    out_w, out_h = max(1, round(w * scale)), max(1, round(h * scale))
+    plane = Image.fromarray(np.ascontiguousarray(heatmap_2d, dtype=np.float32))  # mode "F"
+    plane = np.asarray(plane.resize((out_w, out_h), Image.BILINEAR))
+    indices = np.clip(plane * 255 + 0.5, 0, 255).astype(np.uint8)
+    lut = COLORMAPS.get(colormap or HEATMAP_COLORMAP, COLORMAPS["jet"])
+    rgb = np.take(lut, indices, axis=0)  # a gather, several times faster than lut[indices]
+
+    if output_path:
+        save_heatmap(rgb, output_path, image_format)
+    return rgb
+
+
+def save_heatmap(rgb: np.ndarray, output_path: str, image_format: str = None) -> None:
+    """Encodes a rendered heatmap as PNG or WebP."""
+    image_format = (image_format or HEATMAP_FORMAT).lower()
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    if image_format == "webp":
+        Image.fromarray(rgb).save(output_path, format="WEBP", quality=HEATMAP_WEBP_QUALITY, method=4)
     else:
-        # Fallback if the array is already 2D
-        heatmap_2d = heatmap_3d
-        
-    # 6. Plot using the "Jet" or "Viridis" colormap (Standard for Grad-CAM)
-    plt.figure(figsize=(5, 5))
-    plt.imshow(heatmap_2d, cmap="jet", interpolation='bilinear')
-    plt.axis("off")
-    plt.tight_layout(pad=0)
-
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    plt.savefig(output_path, dpi=150, bbox_inches="tight", pad_inches=0)
-    plt.close()
-    
-    return output 
\ No newline at end of file
+        Image.fromarray(rgb).save(output_path, format="PNG", compress_level=1)
+
+
+# One background thread is enough: encoding takes milliseconds and only
+# has to finish before the study's result is returned
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="heatmap-writer")
+
+
+def save_heatmap_async(rgb: np.ndarray, output_path: str, image_format: str = None) -> Future:
+    """Encodes the display image on the writer thread; result() waits and re-raises encoding errors."""
+    return _writer.submit(save_heatmap, rgb, output_path, image_format)
+
+
+def generate_grad_cam_heatmap(
+    model: torch.nn.Module,
+    input_tensor: torch.Tensor,
+    output_path: str = None,
+    slice_axis: int = 0
+):
+    """
+    model: Your 3D U-Net model
+    input_tensor: The 5D tensor (1, 1, D, H, W) used for reconstruction
+    Returns (output, heatmap RGB image).
+    """
+    output, final_features = forward_with_features(model, input_tensor)
+    heatmap = render_heatmap(final_features, output_path, slice_axis)
+    return output, heatmap
@@ -0,0 +1,89 @@
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+# -----------------------
+# Config
+# -----------------------
+ORT_INTRA_OP_THREADS = int(os.getenv("ORT_INTRA_OP_THREADS", "0"))  # 0 = ORT default
+ORT_INTER_OP_THREADS = int(os.getenv("ORT_INTER_OP_THREADS", "0"))
+
+ONNX_DIR = os.path.join("backend", "models", "onnx")
+
+
+def backend_for(model_name: str) -> str:
+    """
+    Inference backend for a model: <NAME>_BACKEND, else INFERENCE_BACKEND,
+    else torch. Values: "torch" | "ort".
+    """
+    value = os.getenv(f"{model_name.upper()}_BACKEND", os.getenv("INFERENCE_BACKEND", "torch"))
+    return value.strip().lower()
+
+
+def onnx_path(model_name: str) -> str:
+    return os.path.join(ONNX_DIR, f"{model_name}.onnx")
+
+
+class OrtModel:
+    """
+    ONNX Runtime session with the call signature of the torch modules it
+    replaces: takes a torch tensor, returns a torch tensor (or a tuple when
+    the graph has several outputs). Outputs wrap ORT's numpy buffers without
+    copying.
+    """
+
+    def __init__(self, path: str):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ORT_INTRA_OP_THREADS:
+            options.intra_op_num_threads = ORT_INTRA_OP_THREADS
+        if ORT_INTER_OP_THREADS:
+            options.inter_op_num_threads = ORT_INTER_OP_THREADS
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+        self.path = path
+        self.session = ort.InferenceSession(
+            path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_names = [o.name for o in self.session.get_outputs()]
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.class_names: Optional[List[str]] = (
+            json.loads(metadata["class_names"]) if "class_names" in metadata else None
+        )
+        # Graphs exported with a second "features" output feed Grad-CAM directly
+        self.outputs_features = "features" in self.output_names
+
+    def __call__(self, x: torch.Tensor):
+        array = np.ascontiguousarray(x.detach().cpu().numpy(), dtype=np.float32)
+        outputs = self.session.run(self.output_names, {self.input_name: array})
+        tensors = tuple(torch.from_numpy(o) for o in outputs)
+        return tensors[0] if len(tensors) == 1 else tensors
+
+    def eval(self) -> "OrtModel":
+        return self
+
+
+def load_ort_if_selected(model_name: str) -> Optional[OrtModel]:
+    """
+    Returns an OrtModel when <NAME>_BACKEND=ort and the exported graph exists,
+    otherwise None so the caller builds the torch model.
+    """
+    if backend_for(model_name) != "ort":
+        return None
+
+    path = onnx_path(model_name)
+    if not os.path.exists(path):
+        print(f"{path} not found (run python -m training.export_onnx); serving {model_name} with torch")
+        return None
+    try:
+        return OrtModel(path)
+    except ImportError:
+        print(f"onnxruntime is not installed; serving {model_name} with torch")
+        return None
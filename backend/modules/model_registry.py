@@ -0,0 +1,131 @@
+import atexit
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+import torch
+
+
+class _Entry:
+    def __init__(self, name, loader, example_input):
+        self.name = name
+        self.loader = loader
+        self.example_input = example_input
+        self.model = None
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Loads each registered model once per process and runs a warm-up forward
+    pass with a dummy input, so the first real request doesn't pay for
+    construction, weight loading or allocator growth.
+
+    Modules register loaders at import time (cheap); loading happens on the
+    first `get` or on `warm_up` at startup.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._warmup_thread: Optional[threading.Thread] = None
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], torch.nn.Module],
+        example_input: Optional[Callable[[], torch.Tensor]] = None,
+    ) -> None:
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(name, loader, example_input)
+
+    def get(self, name: str) -> torch.nn.Module:
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Model '{name}' is not registered.")
+        if entry.model is None:
+            self._load(entry)
+        if entry.model is None:
+            raise RuntimeError(f"Model '{name}' failed to load: {entry.error}")
+        return entry.model
+
+    def _load(self, entry: _Entry) -> None:
+        with entry.lock:
+            if entry.model is not None:
+                return
+            try:
+                started = time.perf_counter()
+                model = entry.loader()
+                entry.load_seconds = time.perf_counter() - started
+
+                if entry.example_input is not None:
+                    started = time.perf_counter()
+                    with torch.no_grad():
+                        model(entry.example_input())
+                    entry.warmup_seconds = time.perf_counter() - started
+
+                entry.error = None
+                entry.model = model
+            except Exception as exc:
+                entry.error = str(exc)
+                print(f"Model '{entry.name}' failed to load: {exc}")
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> None:
+        for name in list(names or self._entries):
+            if self._stop.is_set():
+                return
+            entry = self._entries[name]
+            if entry.model is None:
+                self._load(entry)
+
+    def warm_up_in_background(self) -> threading.Thread:
+        """
+        Warms up on a daemon thread. The thread is joined by `shutdown` (also
+        registered with atexit): killing it mid forward pass aborts the
+        process from inside torch.
+        """
+        with self._lock:
+            if self._warmup_thread is None:
+                self._stop.clear()
+                self._warmup_thread = threading.Thread(
+                    target=self.warm_up, name="model-warmup", daemon=True
+                )
+                self._warmup_thread.start()
+                atexit.register(self.shutdown)
+            return self._warmup_thread
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Stops a background warm-up after the model it is loading and waits for it."""
+        self._stop.set()
+        thread = self._warmup_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    @property
+    def ready(self) -> bool:
+        return all(entry.model is not None for entry in self._entries.values())
+
+    def status(self) -> dict:
+        def ms(seconds):
+            return round(seconds * 1000, 1) if seconds is not None else None
+
+        return {
+            "ready": self.ready,
+            "models": {
+                name: {
+                    "loaded": entry.model is not None,
+                    "load_ms": ms(entry.load_seconds),
+                    "warmup_ms": ms(entry.warmup_seconds),
+                    "error": entry.error,
+                }
+                for name, entry in self._entries.items()
+            },
+        }
+
+
+registry = ModelRegistry()
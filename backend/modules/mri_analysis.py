@@ -0,0 +1,309 @@
+"""
+MRI classification and segmentation on the reconstruction's heatmap slice.
+
+Runs inside the MRI worker processes (see mri_service.analyze_dicom_zip), so
+the slice is handed over in memory instead of being re-read from disk.
+"""
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+import torchvision.transforms as T
+from PIL import Image
+
+from backend.models.classifier import MRIDiseaseClassifier
+from backend.models.unet import UNet
+from backend.modules.inference_backend import load_ort_if_selected
+from backend.modules.model_registry import registry
+from backend.modules.mri_executor import CLS_MODEL_PATH, SEG_MODEL_PATH
+from backend.modules.quantization import int8_path, load_quantized, precision_for
+
+# =====================
+# CONFIG & CONSTANTS
+# =====================
+DEVICE = "cpu"
+IMAGE_SIZE = 256
+CLS_PRECISION = precision_for("mri_classifier")
+
+# "slice": classify the mid-slice heatmap (default)
+# "volume": classify every axial slice (or a strided subset) in batches and aggregate
+MRI_CLASSIFY_MODE = os.getenv("MRI_CLASSIFY_MODE", "slice").lower()
+MRI_SLICE_BATCH_SIZE = int(os.getenv("MRI_SLICE_BATCH_SIZE", "32"))
+MRI_SLICE_STRIDE = int(os.getenv("MRI_SLICE_STRIDE", "1"))
+MRI_SLICE_MAX = int(os.getenv("MRI_SLICE_MAX", "96"))           # stride grows to stay under this; 0 = no cap
+MRI_SLICE_THREADS = int(os.getenv("MRI_SLICE_THREADS", "0"))    # 0 = keep the worker's torch threads
+MRI_SLICE_AGGREGATE = os.getenv("MRI_SLICE_AGGREGATE", "mean").lower()  # mean | max | topk
+MRI_SLICE_TOPK = int(os.getenv("MRI_SLICE_TOPK", "5"))
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+TUMOR_RISK_MAP: Dict[str, Dict] = {
+    "glioma": {
+        "risks": ["Rapid growth", "Seizures", "Cognitive impairment", "High recurrence"]
+    },
+    "meningioma": {
+        "risks": [
+            "Intracranial pressure",
+            "Vision problems",
+            "Compression of brain structures",
+        ]
+    },
+    "pituitary": {
+        "risks": ["Hormonal imbalance", "Vision loss", "Endocrine dysfunction"]
+    },
+    "notumor": {"risks": ["Normal brain appearance", "Routine monitoring recommended"]},
+}
+
+# =====================
+# MODEL INITIALIZATION (loaded once per process via the registry)
+# =====================
+def _load_seg_model():
+    # MRI_SEGMENTER_BACKEND=ort serves the exported ONNX graph
+    ort_model = load_ort_if_selected("mri_segmenter")
+    if ort_model is not None:
+        return ort_model
+    return _build_seg_model()
+
+
+def _build_seg_model() -> UNet:
+    model = UNet(in_channels=1, num_classes=2)
+    if os.path.exists(SEG_MODEL_PATH):
+        model.load_state_dict(
+            torch.load(SEG_MODEL_PATH, map_location=DEVICE, weights_only=True)
+        )
+    return model.to(DEVICE).eval()
+
+
+def _load_cls_model():
+    # MRI_CLASSIFIER_BACKEND=ort serves the exported ONNX graph
+    ort_model = load_ort_if_selected("mri_classifier")
+    if ort_model is not None:
+        return ort_model
+
+    # MRI_CLASSIFIER_PRECISION=int8 serves the calibrated model from training/quantize.py
+    if CLS_PRECISION == "int8":
+        quantized_path = int8_path(CLS_MODEL_PATH)
+        if os.path.exists(quantized_path):
+            return load_quantized(quantized_path)
+        print(f"{quantized_path} not found, serving fp32 MRI classifier")
+
+    return _build_cls_model()
+
+
+def _build_cls_model() -> MRIDiseaseClassifier:
+    if not os.path.exists(CLS_MODEL_PATH):
+        raise FileNotFoundError(f"Classifier weights not found: {CLS_MODEL_PATH}")
+    cls_ckpt = torch.load(CLS_MODEL_PATH, map_location=DEVICE, weights_only=True)
+    model = MRIDiseaseClassifier(num_classes=len(cls_ckpt["classes"]))
+    model.load_state_dict(cls_ckpt["model_state"])
+    model.class_names = list(cls_ckpt["classes"])
+    return model.to(DEVICE).eval()
+
+
+registry.register(
+    "mri_segmenter",
+    _load_seg_model,
+    example_input=lambda: torch.zeros(1, 1, IMAGE_SIZE, IMAGE_SIZE),
+)
+registry.register(
+    "mri_classifier",
+    _load_cls_model,
+    example_input=lambda: torch.zeros(1, 3, 224, 224),
+)
+
+# =====================
+# PREPROCESSING
+# =====================
+seg_transform = T.Compose([T.Resize((IMAGE_SIZE, IMAGE_SIZE)), T.ToTensor()])
+cls_transform = T.Compose(
+    [
+        T.Resize((224, 224)),
+        T.Grayscale(num_output_channels=3),
+        T.ToTensor(),
+        T.Normalize(mean=list(IMAGENET_MEAN), std=list(IMAGENET_STD)),
+    ]
+)
+
+
+# =====================
+# AI CORE FUNCTIONS
+# =====================
+def segment_tumor(image_tensor):
+    with torch.no_grad():
+        logits = registry.get("mri_segmenter")(image_tensor)
+        pred = torch.argmax(logits, dim=1)
+    return pred[0].cpu().numpy()
+
+
+def analyze_mask(mask):
+    tumor_pixels = int((mask == 1).sum())
+    if tumor_pixels < 100:
+        return {"tumor_detected": False, "tumor_size_pixels": 0, "tumor_location": None}
+
+    coords = np.column_stack(np.where(mask == 1))
+    y, x = coords.mean(axis=0)
+    return {
+        "tumor_detected": True,
+        "tumor_size_pixels": tumor_pixels,
+        "tumor_location": {"x": float(x), "y": float(y)},
+    }
+
+
+def classify_disease(image_tensor):
+    cls_model = registry.get("mri_classifier")
+    class_names = cls_model.class_names
+    with torch.no_grad():
+        logits = cls_model(image_tensor)
+        probs = torch.softmax(logits, dim=1)[0]
+    idx = probs.argmax().item()
+    return {
+        "tumor_type": class_names[idx],
+        "confidence": round(probs[idx].item(), 4),
+        "probabilities": {
+            class_names[i]: round(probs[i].item(), 4) for i in range(len(class_names))
+        },
+    }
+
+
+def slice_indices(depth: int, stride: int = None, max_slices: int = None) -> List[int]:
+    """Axial slices to classify: every `stride`-th one, thinned further to at most max_slices."""
+    stride = max(1, stride or MRI_SLICE_STRIDE)
+    max_slices = MRI_SLICE_MAX if max_slices is None else max_slices
+    if max_slices > 0:
+        stride = max(stride, -(-depth // max_slices))
+    # Centre the strided grid so both ends of the study are treated alike
+    offset = (depth - 1 - ((depth - 1) // stride) * stride) // 2
+    return list(range(offset, depth, stride))
+
+
+def _slices_to_batch(slices: torch.Tensor, low: float, high: float) -> torch.Tensor:
+    """
+    (N, H, W) raw intensities -> (N, 3, 224, 224) classifier input, the
+    tensor counterpart of cls_transform on an 8-bit grayscale image.
+    """
+    x = ((slices - low) / max(high - low, 1e-6)).clamp_(0, 1)
+    x = torch.floor(x * 255) / 255  # same quantisation as the 8-bit images the model was trained on
+    x = F.interpolate(x.unsqueeze(1), size=(224, 224), mode="bilinear", align_corners=False, antialias=True)
+    mean = torch.tensor(IMAGENET_MEAN).view(1, 3, 1, 1)
+    std = torch.tensor(IMAGENET_STD).view(1, 3, 1, 1)
+    return (x.expand(-1, 3, -1, -1) - mean) / std
+
+
+def _aggregate(probs: torch.Tensor, how: str, top_k: int) -> torch.Tensor:
+    """(N, C) per-slice probabilities -> (C,) study-level scores summing to 1."""
+    if how == "max":
+        scores = probs.max(dim=0).values
+    elif how == "topk":
+        k = max(1, min(top_k, probs.shape[0]))
+        scores = probs.topk(k, dim=0).values.mean(dim=0)
+    else:
+        scores = probs.mean(dim=0)
+    return scores / scores.sum()
+
+
+def classify_volume(
+    volume: np.ndarray,
+    batch_size: int = None,
+    stride: int = None,
+    aggregate: str = None,
+    top_k: int = None,
+    max_slices: int = None,
+) -> dict:
+    """
+    Classifies the axial slices of a (D, H, W) volume in batches and
+    aggregates them into one study-level result. The result keeps the
+    classify_disease keys and adds the mean/max/top-k aggregates and a
+    per-slice probability curve.
+    """
+    cls_model = registry.get("mri_classifier")
+    class_names = cls_model.class_names
+    batch_size = max(1, batch_size or MRI_SLICE_BATCH_SIZE)
+    aggregate = aggregate or MRI_SLICE_AGGREGATE
+    top_k = top_k or MRI_SLICE_TOPK
+
+    indices = slice_indices(volume.shape[0], stride, max_slices)
+    source = torch.from_numpy(np.ascontiguousarray(volume, dtype=np.float32))
+    # One intensity window for the whole study keeps slices comparable
+    low, high = (float(v) for v in np.percentile(volume, (0.5, 99.5)))
+
+    previous_threads = torch.get_num_threads()
+    if MRI_SLICE_THREADS:
+        torch.set_num_threads(MRI_SLICE_THREADS)
+    try:
+        chunks = []
+        with torch.no_grad():
+            for start in range(0, len(indices), batch_size):
+                batch = _slices_to_batch(source[indices[start:start + batch_size]], low, high)
+                chunks.append(torch.softmax(cls_model(batch.to(DEVICE)), dim=1).float().cpu())
+    finally:
+        if MRI_SLICE_THREADS:
+            torch.set_num_threads(previous_threads)
+    probs = torch.cat(chunks)
+
+    aggregates = {how: _aggregate(probs, how, top_k) for how in ("mean", "max", "topk")}
+    scores = aggregates.get(aggregate, aggregates["mean"])
+    idx = scores.argmax().item()
+
+    def as_dict(values: torch.Tensor) -> dict:
+        return {class_names[i]: round(values[i].item(), 4) for i in range(len(class_names))}
+
+    return {
+        "tumor_type": class_names[idx],
+        "confidence": round(scores[idx].item(), 4),
+        "probabilities": as_dict(scores),
+        "aggregation": aggregate if aggregate in aggregates else "mean",
+        "aggregates": {how: as_dict(values) for how, values in aggregates.items()},
+        "peak_slice": indices[int(probs[:, idx].argmax())],
+        "slice_curve": {
+            "slice_indices": indices,
+            "probabilities": {
+                name: [round(p, 4) for p in probs[:, i].tolist()] for i, name in enumerate(class_names)
+            },
+        },
+    }
+
+
+# =====================
+# INTEGRATED LOGIC
+# =====================
+def run_ai_analysis(heatmap_image: np.ndarray, volume: Optional[np.ndarray] = None):
+    """
+    Runs AI analysis on the heatmap slice produced by the reconstruction,
+    handed over in memory as an (H, W, 3) uint8 RGB array (or a 2D array).
+    With MRI_CLASSIFY_MODE=volume and the loaded volume passed in, the
+    classification covers every axial slice instead of the heatmap.
+    """
+    image = Image.fromarray(np.ascontiguousarray(heatmap_image)).convert("L")
+
+    # 1. Classification
+    if MRI_CLASSIFY_MODE == "volume" and volume is not None:
+        cls_result = classify_volume(volume)
+    else:
+        cls_input = cls_transform(image).unsqueeze(0).to(DEVICE)
+        cls_result = classify_disease(cls_input)
+
+    # 2. Risks
+    risk_info = TUMOR_RISK_MAP.get(
+        cls_result["tumor_type"].lower(), {"risks": ["Unknown type"]}
+    )
+
+    # 3. Segmentation (if applicable)
+    if cls_result["tumor_type"].lower() == "notumor":
+        seg_result = {
+            "tumor_detected": False,
+            "tumor_size_pixels": 0,
+            "tumor_location": None,
+        }
+    else:
+        seg_input = seg_transform(image).unsqueeze(0).to(DEVICE)
+        mask = segment_tumor(seg_input)
+        seg_result = analyze_mask(mask)
+
+    return {
+        "segmentation": seg_result,
+        "classification": cls_result,
+        "risk_analysis": risk_info,
+    }
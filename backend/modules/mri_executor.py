@@ -0,0 +1,250 @@
+import asyncio
+import multiprocessing
+import os
+import resource
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from backend.modules.inference_backend import backend_for, onnx_path
+from backend.modules.quantization import int8_path, precision_for
+from backend.modules.result_cache import (
+    file_digest,
+    model_fingerprint,
+    result_cache,
+    static_url_to_path,
+)
+
+# -----------------------
+# Config
+# -----------------------
+MRI_POOL_WORKERS = int(os.getenv("MRI_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+MRI_WORKER_THREADS = int(os.getenv("MRI_WORKER_THREADS", "2"))
+MRI_JOB_TIMEOUT = float(os.getenv("MRI_JOB_TIMEOUT", "300"))      # seconds per study
+MRI_JOB_MEMORY_MB = int(os.getenv("MRI_JOB_MEMORY_MB", "0"))      # 0 = unlimited
+
+# Bump when the reconstruction pipeline changes output for the same input
+MRI_PIPELINE_VERSION = "mri-recon-v4"
+
+# Weights read by mri_analysis; part of the result-cache fingerprint
+SEG_MODEL_PATH = "backend/models/unet_brisc.pth"
+CLS_MODEL_PATH = "backend/models/mri_disease_model.pth"
+
+# Extra time the API waits past the in-worker alarm before giving up on a job
+_TIMEOUT_GRACE = 15.0
+
+# Leading cache-key characters appended to artifact filenames
+_ARTIFACT_TAG_LENGTH = 16
+
+# Keys mri_analysis.run_ai_analysis adds to a with_ai result. Kept here so the
+# API process can read them without importing (and registering) the models.
+AI_RESULT_FIELDS = ("segmentation", "classification", "risk_analysis")
+
+
+class MRIJobTimeout(TimeoutError):
+    pass
+
+
+class MRIJobMemoryError(MemoryError):
+    pass
+
+
+# -----------------------
+# Worker side
+# -----------------------
+def _init_worker(memory_mb: int, num_threads: int) -> None:
+    """
+    Runs once in every pool process: applies the memory cap and loads the
+    reconstruction, classification and segmentation models so jobs never pay
+    for it. A model that fails to load (e.g. missing weights) only fails the
+    jobs that ask for it.
+    """
+    if memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    import torch
+    torch.set_num_threads(max(1, num_threads))
+
+    from backend.modules.model_registry import registry
+    from backend.modules.mri_service import get_engine
+    registry.warm_up()
+    get_engine()
+
+
+def _on_alarm(signum, frame):
+    raise MRIJobTimeout("MRI analysis exceeded the time limit.")
+
+
+def _run_job(zip_path: str, timeout: float, with_ai: bool, artifact_tag: str) -> dict:
+    from backend.modules.mri_service import analyze_dicom_zip
+
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return analyze_dicom_zip(zip_path, with_ai=with_ai, artifact_tag=artifact_tag)
+    except RuntimeError as exc:
+        # torch reports allocator failures as RuntimeError
+        if "can't allocate memory" in str(exc) or "not enough memory" in str(exc):
+            raise MRIJobMemoryError("MRI analysis exceeded the memory limit.") from None
+        raise
+    except MemoryError:
+        raise MRIJobMemoryError("MRI analysis exceeded the memory limit.") from None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# -----------------------
+# API side
+# -----------------------
+def _classify_settings() -> str:
+    """The MRI_CLASSIFY_MODE / MRI_SLICE_* values that change the analysis result."""
+    mode = os.getenv("MRI_CLASSIFY_MODE", "slice").lower()
+    if mode != "volume":
+        return mode
+    names = ("MRI_SLICE_STRIDE", "MRI_SLICE_MAX", "MRI_SLICE_AGGREGATE", "MRI_SLICE_TOPK")
+    return ":".join([mode] + [os.getenv(name, "") for name in names])
+
+
+class MRIExecutor:
+    """
+    Runs analyze_dicom_zip in a pool of worker processes so concurrent
+    studies use separate cores instead of sharing one GIL.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = MRI_POOL_WORKERS,
+        timeout: float = MRI_JOB_TIMEOUT,
+        memory_mb: int = MRI_JOB_MEMORY_MB,
+        num_threads: int = MRI_WORKER_THREADS,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.num_threads = num_threads
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    # spawn: forking a process that already started torch threads can deadlock
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.memory_mb, self.num_threads),
+                )
+            return self._pool
+
+    def _reset_pool(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, zip_path: str, with_ai: bool = False, artifact_tag: str = None) -> Future:
+        args = (_run_job, zip_path, self.timeout, with_ai, artifact_tag)
+        try:
+            return self._get_pool().submit(*args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OOM killer); start a fresh pool
+            self._reset_pool()
+            return self._get_pool().submit(*args)
+
+    def _unwrap(self, exc: BaseException):
+        if isinstance(exc, BrokenProcessPool):
+            self._reset_pool()
+            return MRIJobMemoryError("MRI worker process died while analysing the study.")
+        return exc
+
+    @staticmethod
+    def _cache_key(digest: str, with_ai: bool = False) -> str:
+        parts = [
+            MRI_PIPELINE_VERSION,
+            backend_for("mri_reconstructor"),
+            os.getenv("MRI_RECON_MODE", "resample"),
+            os.getenv("VTI_DTYPE", "float32"),
+        ]
+        weights = [onnx_path("mri_reconstructor")]
+        if with_ai:
+            parts += [
+                "ai",
+                backend_for("mri_classifier"),
+                precision_for("mri_classifier"),
+                backend_for("mri_segmenter"),
+                _classify_settings(),
+            ]
+            # Retrained weights must not keep serving cached predictions
+            weights += [
+                CLS_MODEL_PATH,
+                int8_path(CLS_MODEL_PATH),
+                onnx_path("mri_classifier"),
+                SEG_MODEL_PATH,
+                onnx_path("mri_segmenter"),
+            ]
+        version = "-".join(parts)
+        return result_cache.make_key("mri", model_fingerprint(version, *weights), digest)
+
+    @staticmethod
+    def _store(key: str, result: dict) -> dict:
+        artifacts = [
+            static_url_to_path(result[field])
+            for field in ("canonical_volume_file", "reconstruction_file", "heatmap_slice")
+            if result.get(field)
+        ]
+        result_cache.put(key, result, artifacts)
+        return result
+
+    def run(self, zip_path: str, digest: str = None, with_ai: bool = False) -> dict:
+        """
+        Blocking call for worker threads. Duplicate uploads hit the result
+        cache. with_ai adds classification/segmentation to the result.
+        """
+        key = self._cache_key(digest or file_digest(zip_path), with_ai)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Files are named after the cache key, so a hit always serves the
+        # files produced with that key; get() drops entries whose files are gone
+        future = self.submit(zip_path, with_ai, key[:_ARTIFACT_TAG_LENGTH])
+        try:
+            return self._store(key, future.result(timeout=self.timeout + _TIMEOUT_GRACE))
+        except TimeoutError as exc:
+            if isinstance(exc, MRIJobTimeout):
+                raise
+            raise MRIJobTimeout("MRI analysis exceeded the time limit.") from None
+        except BrokenProcessPool as exc:
+            raise self._unwrap(exc) from None
+
+    async def analyze(self, zip_path: str, digest: str = None, with_ai: bool = False) -> dict:
+        """Awaitable variant of `run` for request handlers."""
+        if digest is None:
+            digest = await asyncio.to_thread(file_digest, zip_path)
+        key = self._cache_key(digest, with_ai)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached
+
+        future = asyncio.wrap_future(self.submit(zip_path, with_ai, key[:_ARTIFACT_TAG_LENGTH]))
+        try:
+            result = await asyncio.wait_for(future, timeout=self.timeout + _TIMEOUT_GRACE)
+            return self._store(key, result)
+        except asyncio.TimeoutError as exc:
+            if isinstance(exc, MRIJobTimeout):
+                raise
+            raise MRIJobTimeout("MRI analysis exceeded the time limit.") from None
+        except BrokenProcessPool as exc:
+            raise self._unwrap(exc) from None
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+mri_executor = MRIExecutor()
@@ -1,16 +1,39 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 import torch
 import torch.nn as nn
 import numpy as np
-import scipy.ndimage as ndimage
-import zipfile
-import tempfile
-from collections import defaultdict
-import pydicom
 import vtk
 import h5py
 from vtk.util import numpy_support
-from backend.modules.heatmap import generate_grad_cam_heatmap
+from backend.modules.dicom_loader import load_dicom_series, load_dicom_series_from_zip  # noqa: F401
+from backend.modules.heatmap import (
+    HEATMAP_FORMAT,
+    forward_with_features,
+    generate_grad_cam_heatmap,
+    render_heatmap,
+    save_heatmap_async,
+)
+from backend.modules.inference_backend import load_ort_if_selected
+from backend.modules.model_registry import registry
+from backend.modules.mri_analysis import run_ai_analysis
+from backend.modules.resampling import resample
+from backend.modules.tiling import sliding_window_inference
+from backend.modules.volume_store import level_dataset, save_volume
+
+# "resample": downsample to 128^3, run once, resample back (default)
+# "tiled": overlapping sliding-window inference at native resolution
+MRI_RECON_MODE = os.getenv("MRI_RECON_MODE", "resample")
+MRI_TILE_SIZE = tuple(int(v) for v in os.getenv("MRI_TILE_SIZE", "64,64,64").split(","))
+MRI_TILE_OVERLAP = float(os.getenv("MRI_TILE_OVERLAP", "0.25"))
+
+# VTI output: zlib is what the vtk.js viewer reads; lz4/lzma need a VTK reader
+VTI_COMPRESSOR = os.getenv("VTI_COMPRESSOR", "zlib").lower()   # zlib | lz4 | lzma | none
+VTI_COMPRESSION_LEVEL = int(os.getenv("VTI_COMPRESSION_LEVEL", "1"))
+VTI_DTYPE = os.getenv("VTI_DTYPE", "float32").lower()          # float32 | uint16 | uint8
+
+# VTI files are written here, alongside the heatmap encode and classification
+_vti_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vti-writer")
 
 # ==========================================
 # 1. 3D U-NET ARCHITECTURE (The AI Engine)
@@ -44,22 +67,25 @@ class UNet3DReconstructor(nn.Module):
 class AIReconstructionEngine:
     def __init__(self):
         self.device = torch.device("cpu") 
-        self.model = UNet3DReconstructor().to(self.device)
-        self.model.eval()
+        self.model = registry.get("mri_reconstructor")
 
-    def analyze_volume(self, volume, target_shape, heatmap_path):
+    def analyze_volume(self, volume, target_shape, heatmap_path=None, mode=None):
         """
         Performs 3D Reconstruction and Grad-CAM in one pass.
+        Returns (volume, heatmap RGB image); the image is also written to
+        heatmap_path when one is given.
+        In tiled mode the output keeps the input's native shape and
+        target_shape is ignored.
         """
-        # Downsample for performance to avoid timeouts
-        d, h, w = volume.shape
-        resampled = ndimage.zoom(volume, (128/d, 128/h, 128/w), order=1)
-        
-        # Prepare 5D Tensor: (Batch, Channel, Depth, Height, Width)
-        tensor_in = torch.from_numpy(resampled).float().unsqueeze(0).unsqueeze(0).to(self.device)
+        if (mode or MRI_RECON_MODE) == "tiled":
+            return self.analyze_volume_tiled(volume, heatmap_path)
+
+        # Downsample for performance to avoid timeouts; stays a torch tensor
+        # from here until the final numpy conversion
+        tensor_in = resample(volume, (RECON_SIZE,) * 3, order=1).to(self.device)
 
         # Generate Grad-CAM Heatmap via the specialized module
-        reconstructed_tensor = generate_grad_cam_heatmap(
+        reconstructed_tensor, heatmap = generate_grad_cam_heatmap(
             self.model, 
             tensor_in, 
             heatmap_path, 
@@ -67,109 +93,91 @@ class AIReconstructionEngine:
         )
 
         # Upsample the AI output back to the target VTK shape
-        output_volume = reconstructed_tensor.squeeze().detach().cpu().numpy()
-        final_volume = ndimage.zoom(
-            output_volume, 
-            (target_shape[0]/128, target_shape[1]/128, target_shape[2]/128), 
-            order=3
-        )
+        final_volume = resample(
+            reconstructed_tensor.detach().float().cpu(), target_shape, order=3
+        ).squeeze().numpy()
         final_volume[final_volume < 0.15] = 0
         
-        return final_volume
-
-# ==========================================
-# CORE DICOM & VTK FUNCTIONS
-# ==========================================
-
-def is_valid_dicom_file(path: str) -> bool:
-    name = os.path.basename(path)
-    return (os.path.isfile(path) and name.lower().endswith(".dcm") and 
-            not name.startswith("._") and "__MACOSX" not in path)
+        return final_volume, heatmap
 
+    def analyze_volume_tiled(self, volume, heatmap_path=None, tile_size=None, overlap=None):
+        """
+        Native-resolution reconstruction: the U-Net runs on overlapping
+        tiles blended with Gaussian weights, so peak memory depends on the
+        tile size rather than the study size.
+        """
+        output_volume, feature_volume = sliding_window_inference(
+            volume,
+            lambda patch: forward_with_features(self.model, patch.to(self.device)),
+            tile_size=tile_size or MRI_TILE_SIZE,
+            overlap=MRI_TILE_OVERLAP if overlap is None else overlap,
+        )
+        heatmap = render_heatmap(feature_volume, heatmap_path, slice_axis=0)
 
-def load_dicom_series(dicom_root: str):
-    dicom_files = []
-    for root, _, files in os.walk(dicom_root):
-        for f in files:
-            full_path = os.path.join(root, f)
-            if is_valid_dicom_file(full_path):
-                dicom_files.append(full_path)
-
-    if not dicom_files:
-        raise ValueError("No DICOM files found.")
-
-    series_map = defaultdict(list)
-    for path in dicom_files:
-        try:
-            ds = pydicom.dcmread(path, stop_before_pixels=True, force=True)
-            uid = ds.SeriesInstanceUID
-            series_map[uid].append(path)
-        except Exception:
-            continue
-
-    series_uid = max(series_map, key=lambda k: len(series_map[k]))
-    series_files = series_map[series_uid]
-
-    slice_data = []
-    first_ds = None
+        output_volume[output_volume < 0.15] = 0
+        return output_volume, heatmap
 
-    for path in series_files:
-        try:
-            ds = pydicom.dcmread(path, force=True)
-            if not hasattr(ds, "pixel_array"):
-                continue
 
-            if first_ds is None:
-                first_ds = ds
+RECON_SIZE = 128
 
-            z_pos = float(ds.ImagePositionPatient[2]) if "ImagePositionPatient" in ds else float(ds.InstanceNumber)
-            slice_data.append((z_pos, ds.pixel_array.astype(np.float32)))
-        except Exception:
-            continue
 
-    unique_slices = defaultdict(list)
-    for z, pixels in slice_data:
-        unique_slices[z].append(pixels)
+def _load_reconstructor():
+    # MRI_RECONSTRUCTOR_BACKEND=ort serves the exported ONNX graph
+    ort_model = load_ort_if_selected("mri_reconstructor")
+    if ort_model is not None:
+        return ort_model
+    return UNet3DReconstructor().to(torch.device("cpu")).eval()
 
-    sorted_zs = sorted(unique_slices.keys())
-    volume = np.stack([np.mean(unique_slices[z], axis=0) for z in sorted_zs], axis=0)
 
-    pixel_spacing = getattr(first_ds, "PixelSpacing", [1.0, 1.0])
-    dz = np.abs(np.diff(sorted_zs)).mean() if len(sorted_zs) > 1 else getattr(first_ds, "SliceThickness", 1.0)
+# Warm-up uses the real 128^3 input so the allocator is sized for actual studies
+registry.register(
+    "mri_reconstructor",
+    _load_reconstructor,
+    example_input=lambda: torch.zeros(1, 1, RECON_SIZE, RECON_SIZE, RECON_SIZE),
+)
 
-    spacing = (float(dz), float(pixel_spacing[0]), float(pixel_spacing[1]))
+_engine = None
 
-    # Normalize to [0, 1]
-    volume = (volume - volume.min()) / (volume.max() - volume.min() + 1e-8)
 
-    return volume, spacing, series_uid, len(series_map)
+def get_engine() -> AIReconstructionEngine:
+    """
+    Returns this process's reconstruction engine, building it on first use.
+    """
+    global _engine
+    if _engine is None:
+        _engine = AIReconstructionEngine()
+    return _engine
 
+# ==========================================
+# CORE DICOM & VTK FUNCTIONS
+# ==========================================
 
 def save_h5(volume, spacing, series_uid, out_path):
-    with h5py.File(out_path, "w") as f:
-        f.create_dataset(
-            "volume",
-            data=volume,
-            compression="gzip",
-            compression_opts=4,
-        )
-        f.attrs["spacing"] = spacing
-        f.attrs["series_uid"] = series_uid.encode("utf-8")
+    # Chunked volume + 1/2, 1/4, 1/8 pyramid; codec from H5_CODEC
+    save_volume(out_path, volume, spacing, series_uid)
 
 
-def load_h5(h5_path):
+def load_h5(h5_path, factor: int = 1):
+    """factor selects a pyramid level (1 = full resolution, 2/4/8 = downsampled)."""
     with h5py.File(h5_path, "r") as f:
-        volume = f["volume"][:]
+        volume = level_dataset(f, factor)[:]
         spacing = tuple(f.attrs["spacing"])
         series_uid = f.attrs["series_uid"]
     return volume, spacing, series_uid
 
 
-def save_vtk_volume(volume: np.ndarray, spacing, output_path: str):
+def save_vtk_volume(volume: np.ndarray, spacing, output_path: str, dtype=None, compressor=None):
     """
     Saves a PRE-RECONSTRUCTED volume as VTK ImageData.
+
+    The (D, H, W) C-order array already has x varying fastest, which is the
+    VTK point order for dimensions (W, H, D), so the buffer is handed to VTK
+    without a transpose or copy. Data is written as compressed appended
+    binary. uint8/uint16 output stores value = raw * ScalarScale +
+    ScalarOffset in the file's field data.
     """
     depth, height, width = volume.shape
+    dtype = (dtype or VTI_DTYPE).lower()
 
     # Build VTK ImageData
     image_data = vtk.vtkImageData()
@@ -177,21 +185,41 @@ def save_vtk_volume(volume: np.ndarray, spacing, output_path: str):
     image_data.SetSpacing(spacing[2], spacing[1], spacing[0])
     image_data.SetOrigin(0, 0, 0)
 
-    # Convert numpy to VTK (x, y, z)
-    volume_vtk = np.transpose(volume, (2, 1, 0)) 
-    volume_vtk = np.ascontiguousarray(volume_vtk, dtype=np.float32)
-
-    vtk_array = numpy_support.numpy_to_vtk(
-        volume_vtk.ravel(order="C"), 
-        deep=True, 
-        array_type=vtk.VTK_FLOAT
-    )
+    if dtype in ("uint8", "uint16"):
+        levels = np.iinfo(dtype).max
+        low, high = float(volume.min()), float(volume.max())
+        scale = max(high - low, 1e-12) / levels
+        scalars = np.rint((volume - low) / scale).astype(dtype)
+        for name, value in (("ScalarScale", scale), ("ScalarOffset", low)):
+            field = vtk.vtkDoubleArray()
+            field.SetName(name)
+            field.InsertNextValue(value)
+            image_data.GetFieldData().AddArray(field)
+    else:
+        # No-op for the float32 volumes the engine returns
+        scalars = np.ascontiguousarray(volume, dtype=np.float32)
+
+    # deep=False shares the numpy buffer; `scalars` stays referenced until Write()
+    vtk_array = numpy_support.numpy_to_vtk(scalars.reshape(-1), deep=False)
     vtk_array.SetName("Scalars")
     image_data.GetPointData().SetScalars(vtk_array)
 
     writer = vtk.vtkXMLImageDataWriter()
     writer.SetFileName(output_path)
     writer.SetInputData(image_data)
+    writer.SetDataModeToAppended()
+    writer.EncodeAppendedDataOff()  # raw bytes, not base64
+    compressor = (compressor or VTI_COMPRESSOR).lower()
+    if compressor == "lz4":
+        writer.SetCompressorTypeToLZ4()
+    elif compressor == "lzma":
+        writer.SetCompressorTypeToLZMA()
+    elif compressor == "none":
+        writer.SetCompressorTypeToNone()
+    else:
+        writer.SetCompressorTypeToZLib()
+    if compressor != "none":
+        writer.SetCompressionLevel(VTI_COMPRESSION_LEVEL)
     writer.Write()
 
     print(f"Saved VTI: {os.path.getsize(output_path) / 1024:.1f} KB")
@@ -205,70 +233,80 @@ def h5_to_vti(h5_path: str, vti_path: str):
     save_vtk_volume(volume, spacing, vti_path)
 
 
-def analyze_dicom_zip(zip_path: str):
+def analyze_dicom_zip(zip_path: str, with_ai: bool = False, artifact_tag: str = None):
     """
-    Main entry point: Extracts ZIP, loads DICOM, preserves raw H5 data,
-    performs AI U-Net reconstruction, and generates Grad-CAM heatmap.
+    Main entry point: Streams DICOM from the ZIP, preserves raw H5 data,
+    performs AI U-Net reconstruction and generates Grad-CAM heatmap. With
+    with_ai=True, classification/segmentation also run on the heatmap slice
+    held in memory (needs the classifier weights).
+
+    artifact_tag is appended to the output filenames, so runs with different
+    inputs or settings for the same series never overwrite each other's files.
     """
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # 1. Extract the uploaded files
-        with zipfile.ZipFile(zip_path, "r") as zip_ref:
-            zip_ref.extractall(tmpdir)
-
-        # 2. Load the raw DICOM series into a 3D Volume
-        # Returns: volume (numpy), spacing (tuple), series_uid (str), series_count (int)
-        volume, spacing, series_uid, series_count = load_dicom_series(tmpdir)
-
-        # 3. Setup output directories
-        recon_dir = os.path.join("backend", "static", "reconstructions")
-        os.makedirs(recon_dir, exist_ok=True)
-
-        # Define file paths
-        h5_filename = f"{series_uid}.h5"
-        h5_path = os.path.join(recon_dir, h5_filename)
-        
-        vti_filename = f"{series_uid}.vti"
-        vti_path = os.path.join(recon_dir, vti_filename)
-        
-        heatmap_filename = f"{series_uid}_heatmap.png"
-        heatmap_path = os.path.join(recon_dir, heatmap_filename)
-
-        # 4. Save Raw HDF5 (CRITICAL for your teammate's research/data analysis)
-        save_h5(volume, spacing, series_uid, h5_path)
-
-        # 5. Execute AI Reconstruction Engine (3D U-Net + Grad-CAM)
-        engine = AIReconstructionEngine()
-        ai_volume = engine.analyze_volume(
-            volume, 
-            target_shape=(128, 128, 128), 
-            heatmap_path=heatmap_path
-        )
+    # 1. Load the raw DICOM series into a 3D Volume, streamed from the archive
+    # Returns: volume (numpy), spacing (tuple), series_uid (str), series_count (int)
+    volume, spacing, series_uid, series_count = load_dicom_series_from_zip(zip_path)
+
+    # 2. Setup output directories
+    recon_dir = os.path.join("backend", "static", "reconstructions")
+    os.makedirs(recon_dir, exist_ok=True)
+
+    # Define file paths
+    stem = f"{series_uid}_{artifact_tag}" if artifact_tag else series_uid
+    h5_filename = f"{stem}.h5"
+    h5_path = os.path.join(recon_dir, h5_filename)
+    
+    vti_filename = f"{stem}.vti"
+    vti_path = os.path.join(recon_dir, vti_filename)
+    
+    heatmap_filename = f"{stem}_heatmap.{HEATMAP_FORMAT}"
+    heatmap_path = os.path.join(recon_dir, heatmap_filename)
+
+    # 3. Save Raw HDF5 (CRITICAL for your teammate's research/data analysis)
+    save_h5(volume, spacing, series_uid, h5_path)
+
+    # 4. Execute AI Reconstruction Engine (3D U-Net + Grad-CAM)
+    engine = get_engine()
+    ai_volume, heatmap = engine.analyze_volume(
+        volume, 
+        target_shape=(128, 128, 128), 
+    )
 
-        # 6. Save the AI-enhanced volume as VTK (.vti) for the frontend 3D viewer
-        save_vtk_volume(ai_volume, spacing, vti_path)
-
-        d, h, w = ai_volume.shape
-
-        # 7. Return metadata to the frontend
-        return {
-            "modality": "medical_volume",
-            "input_type": "dicom_zip",
-            "reconstruction_engine": "3D U-Net",
-            "heatmap_type": "Grad-CAM",
-            "series_uid": series_uid,
-            "series_detected": series_count,
-            "volume_shape": {
-                "depth": int(d),
-                "height": int(h),
-                "width": int(w),
-            },
-            "voxel_spacing": spacing,
-            "canonical_volume_file": f"/static/reconstructions/{h5_filename}",
-            "reconstruction_file": f"/static/reconstructions/{vti_filename}",
-            "heatmap_slice": f"/static/reconstructions/{heatmap_filename}",
-            "statistics": {
-                "mean_intensity": round(float(ai_volume.mean()), 4),
-                "max_intensity": round(float(ai_volume.max()), 4),
-            },
-            "disclaimer": "AI-generated reconstruction for research support only."
-        }
\ No newline at end of file
+    # 5. The display image and the AI-enhanced volume (.vti, for the
+    # frontend 3D viewer) are written on their own threads, overlapping each
+    # other and classification/segmentation of the in-memory slice
+    heatmap_written = save_heatmap_async(heatmap, heatmap_path)
+    vti_written = _vti_writer.submit(save_vtk_volume, ai_volume, spacing, vti_path)
+    ai_results = run_ai_analysis(heatmap, volume) if with_ai else {}
+
+    # 6. The writes stay on the job's path: the viewer loads the URLs as soon
+    # as they are returned, so the job waits for both files
+    heatmap_written.result()
+    vti_written.result()
+
+    d, h, w = ai_volume.shape
+
+    # 7. Return metadata to the frontend
+    return {
+        "modality": "medical_volume",
+        "input_type": "dicom_zip",
+        "reconstruction_engine": "3D U-Net",
+        "heatmap_type": "Grad-CAM",
+        "series_uid": series_uid,
+        "series_detected": series_count,
+        "volume_shape": {
+            "depth": int(d),
+            "height": int(h),
+            "width": int(w),
+        },
+        "voxel_spacing": spacing,
+        "canonical_volume_file": f"/static/reconstructions/{h5_filename}",
+        "reconstruction_file": f"/static/reconstructions/{vti_filename}",
+        "heatmap_slice": f"/static/reconstructions/{heatmap_filename}",
+        "statistics": {
+            "mean_intensity": round(float(ai_volume.mean()), 4),
+            "max_intensity": round(float(ai_volume.max()), 4),
+        },
+        "disclaimer": "AI-generated reconstruction for research support only.",
+        **ai_results,
+    }
\ No newline at end of file
@@ -0,0 +1,128 @@
+import json
+import os
+import time
+from typing import Iterable, List, Optional
+
+import torch
+import torch.nn as nn
+
+# fbgemm/x86 kernels for server CPUs; qnnpack for ARM hosts
+QUANT_ENGINE = os.getenv(
+    "QUANT_ENGINE",
+    "x86" if "x86" in torch.backends.quantized.supported_engines else "qnnpack",
+)
+
+
+def _set_engine() -> None:
+    if QUANT_ENGINE in torch.backends.quantized.supported_engines:
+        torch.backends.quantized.engine = QUANT_ENGINE
+
+
+def precision_for(model_name: str) -> str:
+    """
+    Serving precision for a model: <NAME>_PRECISION, else MODEL_PRECISION,
+    else fp32. Values: "fp32" | "int8".
+    """
+    value = os.getenv(f"{model_name.upper()}_PRECISION", os.getenv("MODEL_PRECISION", "fp32"))
+    return value.strip().lower()
+
+
+def int8_path(weights_path: str) -> str:
+    """backend/models/xray_model.pth -> backend/models/xray_model_int8.pt"""
+    root, _ = os.path.splitext(weights_path)
+    return f"{root}_int8.pt"
+
+
+# ==========================================
+# QUANTIZATION
+# ==========================================
+def quantize_static(
+    model: nn.Module,
+    calibration_batches: Iterable[torch.Tensor],
+    example_input: torch.Tensor,
+) -> nn.Module:
+    """
+    Post-training static INT8 quantization (FX graph mode): conv/bn/relu are
+    fused, observers collect activation ranges over the calibration batches,
+    then the graph is converted to quantized kernels.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    _set_engine()
+    model = model.eval()
+    prepared = prepare_fx(model, get_default_qconfig_mapping(QUANT_ENGINE), (example_input,))
+    with torch.no_grad():
+        for batch in calibration_batches:
+            prepared(batch)
+    return convert_fx(prepared)
+
+
+def quantize_dynamic(model: nn.Module) -> nn.Module:
+    """
+    Dynamic INT8 quantization. Only nn.Linear layers are converted, which for
+    a ResNet is just the classifier head, so expect a small speed-up.
+    """
+    return torch.ao.quantization.quantize_dynamic(model.eval(), {nn.Linear}, dtype=torch.qint8)
+
+
+def save_quantized(
+    model: nn.Module,
+    example_input: torch.Tensor,
+    path: str,
+    class_names: Optional[List[str]] = None,
+) -> None:
+    """
+    Saves as TorchScript so serving can load the int8 graph without
+    re-running FX preparation. Class names travel as an extra file.
+    """
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example_input)
+    extra_files = {"classes.json": json.dumps(class_names or [])}
+    torch.jit.save(torch.jit.freeze(traced.eval()), path, _extra_files=extra_files)
+
+
+def load_quantized(path: str) -> "LabeledModule":
+    _set_engine()
+    extra_files = {"classes.json": ""}
+    model = torch.jit.load(path, map_location="cpu", _extra_files=extra_files)
+    model.eval()
+    class_names = json.loads(extra_files["classes.json"] or "[]") or None
+    return LabeledModule(model, class_names).eval()
+
+
+class LabeledModule(nn.Module):
+    """Wraps a TorchScript model so metadata like class_names can ride along."""
+
+    def __init__(self, model: nn.Module, class_names: Optional[List[str]] = None):
+        super().__init__()
+        self.model = model
+        self.class_names = class_names
+
+    def forward(self, x):
+        return self.model(x)
+
+
+# ==========================================
+# MEASUREMENT
+# ==========================================
+def measure_latency(model: nn.Module, example_input: torch.Tensor, repeats: int = 30) -> dict:
+    """Mean single-call latency (ms) and throughput (samples/s) for one input shape."""
+    with torch.no_grad():
+        for _ in range(3):
+            model(example_input)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            model(example_input)
+        elapsed = time.perf_counter() - started
+
+    batch = example_input.shape[0]
+    return {
+        "batch_size": batch,
+        "latency_ms": round(1000 * elapsed / repeats, 3),
+        "throughput_per_s": round(batch * repeats / elapsed, 1),
+    }
+
+
+def file_size_mb(path: str) -> float:
+    return round(os.path.getsize(path) / (1024 * 1024), 2)
@@ -1,9 +1,7 @@
 import nibabel as nib
 import numpy as np
 import os
-import gzip
-import base64
-from io import BytesIO
+from backend.modules.volume_transport import encode_array
 # =========================================
 # 1. 3D RECONSTRUCTION (demo placeholder)
 # =========================================
@@ -51,22 +49,21 @@ def analyze_injury(filepath: str) -> dict:
         "classification": classification,
         "risks_json": {"risk": risk_level}
     }
-def reconstruct_volume(file_bytes: bytes):
-    # Load NIfTI from bytes
-    file_like = BytesIO(file_bytes)
-    img = nib.load(file_like)
-    data = img.get_fdata(dtype=np.float32)
-
-    shape = data.shape
-
-    # Flatten and compress
-    flat = data.flatten()
-    buf = BytesIO()
-    with gzip.GzipFile(fileobj=buf, mode="wb") as f:
-        f.write(flat.tobytes())
-    compressed_bytes = buf.getvalue()
-
-    # Encode as base64
-    volume_b64 = base64.b64encode(compressed_bytes).decode("utf-8")
+def reconstruct_volume(file_bytes: bytes, dtype: str = "float16"):
+    """
+    NIfTI bytes -> (header, raw little-endian voxels) in the same format as
+    GET /api/volumes/{scan_id}: z-slowest (z, y, x) voxels, no base64, no gzip
+    (leave that to HTTP Content-Encoding), and the voxels are read straight
+    from the file's data block instead of a float64 get_fdata copy.
+    4D images send their first volume.
+    """
+    img = nib.Nifti1Image.from_bytes(file_bytes)
+    data = np.asarray(img.dataobj, dtype=np.float32)
+    if data.ndim == 4:
+        data = data[..., 0]
 
-    return shape, volume_b64
+    # NIfTI arrays are (x, y, z); the volume format is (z, y, x)
+    header, payload = encode_array(np.ascontiguousarray(data.transpose(2, 1, 0)), dtype)
+    header["axes"] = "zyx"
+    header["spacing"] = [float(s) for s in img.header.get_zooms()[:3][::-1]]
+    return header, payload
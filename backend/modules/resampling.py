@@ -0,0 +1,63 @@
+from typing import Sequence, Union
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+# Orders accepted by resample(), named after the ndimage.zoom orders they replace
+MODES = {1: "linear", 3: "cubic"}
+
+
+def as_volume_tensor(volume: Union[np.ndarray, torch.Tensor]) -> torch.Tensor:
+    """(D, H, W) array or tensor -> float32 (1, 1, D, H, W) tensor (no copy for float32 input)."""
+    if isinstance(volume, np.ndarray):
+        volume = torch.from_numpy(np.ascontiguousarray(volume, dtype=np.float32))
+    volume = volume.float()
+    while volume.dim() < 5:
+        volume = volume.unsqueeze(0)
+    return volume
+
+
+def _bicubic_depth(x: torch.Tensor, depth: int) -> torch.Tensor:
+    """Cubic interpolation along D only: W is folded into the batch and (D, H) resampled as images."""
+    n, c, d, h, w = x.shape
+    planes = x.permute(0, 1, 4, 2, 3).reshape(n * c * w, 1, d, h)
+    planes = F.interpolate(planes, size=(depth, h), mode="bicubic", align_corners=True)
+    return planes.reshape(n, c, w, depth, h).permute(0, 1, 3, 4, 2).contiguous()
+
+
+def resample(
+    volume: Union[np.ndarray, torch.Tensor],
+    size: Sequence[int],
+    order: int = 1,
+) -> torch.Tensor:
+    """
+    Resamples a (D, H, W) volume to `size` with torch's multithreaded
+    interpolate and returns a float32 (1, 1, D, H, W) tensor, so callers can
+    feed the result straight into a network without a numpy round-trip.
+
+    order=1 is trilinear, order=3 separable cubic (bicubic over H/W, then
+    cubic along D). Corners are aligned like ndimage.zoom. Returns the input
+    unchanged when it already has the requested size.
+    """
+    if order not in MODES:
+        raise ValueError(f"Unsupported resampling order {order}; use one of {sorted(MODES)}.")
+
+    x = as_volume_tensor(volume)
+    size = tuple(int(s) for s in size)
+    if tuple(x.shape[2:]) == size:
+        return x
+
+    with torch.no_grad():
+        if order == 1:
+            return F.interpolate(x, size=size, mode="trilinear", align_corners=True)
+
+        n, c, d, h, w = x.shape
+        if (h, w) != size[1:]:
+            planes = F.interpolate(
+                x.reshape(n * c * d, 1, h, w), size=size[1:], mode="bicubic", align_corners=True
+            )
+            x = planes.reshape(n, c, d, size[1], size[2])
+        if d != size[0]:
+            x = _bicubic_depth(x, size[0])
+        return x
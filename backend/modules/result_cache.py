@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Iterable, Optional
+
+# -----------------------
+# Config
+# -----------------------
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join("backend", "cache", "results"))
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "256"))
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") not in {"0", "false", "False"}
+
+_CHUNK = 1024 * 1024
+_EVICT_TO = 0.9  # fraction of max_bytes left after an eviction pass
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_fingerprint(version: str, *weight_paths: str) -> str:
+    """
+    Model version string plus size/mtime of its weight files, so retrained
+    weights invalidate cached results without a manual version bump.
+    """
+    parts = [version]
+    for path in weight_paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{os.path.basename(path)}:missing")
+    return "|".join(parts)
+
+
+def static_url_to_path(url: str) -> str:
+    """/static/reconstructions/x.vti -> backend/static/reconstructions/x.vti"""
+    return url.replace("/static", os.path.join("backend", "static"), 1).lstrip("/")
+
+
+class ResultCache:
+    """
+    Disk-backed cache of analysis results keyed by a content hash of the
+    upload plus the model fingerprint. One JSON file per entry; entries are
+    evicted least-recently-used (by mtime) once the directory exceeds
+    `max_bytes`. Shared safely between the API and MRI worker processes
+    because writes are atomic renames.
+
+    Each process keeps a running byte total (one directory scan to seed it)
+    so a put is O(1); the directory is only walked again when the total
+    goes over `max_bytes`, which also resyncs it with writes made by other
+    processes. Eviction trims to a low-water mark below `max_bytes` so a
+    full cache does not rescan on every put.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, enabled: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes: Optional[int] = None
+
+    @staticmethod
+    def make_key(namespace: str, fingerprint: str, digest: str) -> str:
+        return hashlib.sha256(f"{namespace}\0{fingerprint}\0{digest}".encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            entry = None
+
+        # An entry whose artifacts were deleted is useless; treat as a miss
+        if entry is not None and not all(os.path.exists(p) for p in entry.get("artifacts", [])):
+            self._remove(path)
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return entry["result"]
+
+    def put(self, key: str, result: dict, artifacts: Iterable[str] = ()) -> None:
+        if not self.enabled:
+            return
+
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"result": result, "artifacts": list(artifacts)}, f)
+        size = os.path.getsize(tmp_path)
+        replaced = self._size(path)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(entry_size for _, entry_size, _ in self._entries())
+            else:
+                self._total_bytes += size - replaced
+            over = self._total_bytes > self.max_bytes
+        if over:
+            self._evict()
+
+    def get_or_compute(
+        self,
+        namespace: str,
+        fingerprint: str,
+        upload_path: str,
+        compute: Callable[[], dict],
+        digest: Optional[str] = None,
+        artifacts: Callable[[dict], Iterable[str]] = lambda result: (),
+    ) -> dict:
+        if not self.enabled:
+            return compute()
+
+        key = self.make_key(namespace, fingerprint, digest or file_digest(upload_path))
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        result = compute()
+        self.put(key, result, artifacts(result))
+        return result
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _remove(self, path: str) -> None:
+        size = self._size(path)
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes = max(0, self._total_bytes - size)
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * _EVICT_TO if total > self.max_bytes else self.max_bytes
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        with self._lock:
+            self._total_bytes = total
+
+    def stats(self) -> dict:
+        entries = list(self._entries()) if self.enabled else []
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+            }
+
+
+result_cache = ResultCache(
+    RESULT_CACHE_DIR,
+    max_bytes=int(RESULT_CACHE_MAX_MB * 1024 * 1024),
+    enabled=RESULT_CACHE_ENABLED,
+)
@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class ScanJobQueue:
+    """
+    Bounded background worker pool for scan predictions.
+
+    At most `max_workers` jobs run at once and at most `max_pending` more wait
+    in line; beyond that `submit` raises QueueFullError so the API can push
+    back instead of buffering uploads without limit.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16):
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(0, int(max_pending))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="scan-job"
+        )
+        self._lock = threading.Lock()
+        self._inflight: Dict[int, Future] = {}
+        self._accepting = True
+        self._completed = 0
+        self._failed = 0
+
+    def submit(self, scan_id: int, fn: Callable, *args) -> Future:
+        with self._lock:
+            if not self._accepting:
+                raise QueueFullError("Server is shutting down.")
+            if len(self._inflight) >= self.max_workers + self.max_pending:
+                raise QueueFullError("Prediction queue is full, try again later.")
+            future = self._executor.submit(fn, scan_id, *args)
+            self._inflight[scan_id] = future
+
+        future.add_done_callback(lambda f, sid=scan_id: self._on_done(sid, f))
+        return future
+
+    def _on_done(self, scan_id: int, future: Future) -> None:
+        with self._lock:
+            self._inflight.pop(scan_id, None)
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def is_queued(self, scan_id: int) -> bool:
+        with self._lock:
+            return scan_id in self._inflight
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = sum(1 for f in self._inflight.values() if f.running())
+            return {
+                "accepting": self._accepting,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "running": running,
+                "pending": len(self._inflight) - running,
+                "completed": self._completed,
+                "failed": self._failed,
+            }
+
+    def shutdown(
+        self,
+        timeout: float = 60.0,
+        on_cancelled: Optional[Callable[[List[int]], None]] = None,
+    ) -> int:
+        """
+        Stops accepting jobs and waits up to `timeout` seconds for in-flight
+        jobs to finish. Jobs that never started are cancelled and their scan
+        ids passed to `on_cancelled`, so the caller can mark them failed
+        instead of leaving them 'uploaded'. Returns the number of jobs left
+        unfinished.
+        """
+        with self._lock:
+            self._accepting = False
+            jobs = list(self._inflight.items())
+
+        started = time.perf_counter()
+        _, not_done = wait([future for _, future in jobs], timeout=timeout)
+        cancelled = [scan_id for scan_id, future in jobs if future in not_done and future.cancel()]
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        remaining = sum(1 for f in not_done if not f.cancelled())
+        print(
+            f"Scan jobs drained in {time.perf_counter() - started:.1f}s "
+            f"({remaining} still running, {len(cancelled)} cancelled)"
+        )
+        if cancelled and on_cancelled is not None:
+            on_cancelled(cancelled)
+        return remaining
+
+
+scan_jobs = ScanJobQueue(
+    max_workers=int(os.getenv("SCAN_JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("SCAN_JOB_MAX_PENDING", "16")),
+)
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+
+class SingleFlightCache:
+    """
+    Holds one computed value for `ttl` seconds.
+
+    Concurrent misses are coalesced: the first caller computes while the rest
+    wait for its result instead of issuing the same queries; `get_async` does
+    the same for coroutines without blocking the event loop. `invalidate()`
+    drops the value; a computation that was already running when it was
+    invalidated is returned to its callers but not cached.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value: Any = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._state_lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+        self._async_lock: Optional[asyncio.Lock] = None
+        self.hits = 0
+        self.misses = 0
+        self.computations = 0
+
+    def _fresh(self) -> Optional[Any]:
+        """The cached value if still valid (counted as a hit), else None."""
+        with self._state_lock:
+            if self._value is not None and time.monotonic() < self._expires_at:
+                self.hits += 1
+                return self._value
+            return None
+
+    def _begin(self) -> int:
+        with self._state_lock:
+            self.misses += 1
+            return self._generation
+
+    def _store(self, generation: int, value: Any) -> None:
+        with self._state_lock:
+            self.computations += 1
+            if generation == self._generation:
+                self._value = value
+                self._expires_at = time.monotonic() + self.ttl
+
+    def get(self, compute: Callable[[], Any]) -> Any:
+        value = self._fresh()
+        if value is not None:
+            return value
+
+        with self._compute_lock:
+            # Another caller may have filled it while we waited
+            value = self._fresh()
+            if value is not None:
+                return value
+
+            generation = self._begin()
+            value = compute()
+            self._store(generation, value)
+            return value
+
+    async def get_async(self, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = self._fresh()
+        if value is not None:
+            return value
+
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            value = self._fresh()
+            if value is not None:
+                return value
+
+            generation = self._begin()
+            value = await compute()
+            self._store(generation, value)
+            return value
+
+    def invalidate(self) -> None:
+        with self._state_lock:
+            self._generation += 1
+            self._value = None
+            self._expires_at = 0.0
+
+    def stats(self) -> dict:
+        with self._state_lock:
+            return {
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "computations": self.computations,
+            }
+
+
+# General Dashboard counters; invalidated whenever scans are written
+dashboard_cache = SingleFlightCache(ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "30")))
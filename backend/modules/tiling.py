@@ -0,0 +1,93 @@
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+
+def _tile_starts(length: int, tile: int, step: int) -> List[int]:
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)  # last tile flush with the far edge
+    return starts
+
+
+def gaussian_weight(tile: Sequence[int], sigma_scale: float = 0.125) -> torch.Tensor:
+    """
+    Separable Gaussian importance map centred on the tile: voxels near tile
+    borders (where padding artefacts live) count less when tiles overlap.
+    """
+    weight = torch.ones(())
+    for size in tile:
+        coords = torch.arange(size, dtype=torch.float32) - (size - 1) / 2
+        sigma = max(size * sigma_scale, 1e-3)
+        axis = torch.exp(-(coords ** 2) / (2 * sigma ** 2))
+        weight = weight.unsqueeze(-1) * axis
+    weight = weight / weight.max()
+    # Keep a floor so the far edges of the volume never divide by ~0
+    return weight.clamp_min(1e-3)
+
+
+def sliding_window_inference(
+    volume: np.ndarray,
+    forward: Callable[[torch.Tensor], Tuple[torch.Tensor, torch.Tensor]],
+    tile_size: Sequence[int] = (64, 64, 64),
+    overlap: float = 0.25,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Runs `forward` on overlapping (D, H, W) tiles of `volume` and blends the
+    results with Gaussian weighting, so the network sees native resolution
+    while peak activation memory is bounded by the tile size.
+
+    forward: takes a (1, 1, d, h, w) tensor and returns (output, features),
+             both (1, C, d, h, w).
+    Returns (output, features) as float32 arrays of shape (D, H, W) (channel
+    dimension squeezed when it is 1).
+    """
+    tile = tuple(int(t) for t in tile_size)
+    overlap = min(max(overlap, 0.0), 0.9)
+    steps = [max(1, int(t * (1 - overlap))) for t in tile]
+
+    source = torch.from_numpy(np.ascontiguousarray(volume, dtype=np.float32))
+    shape = tuple(source.shape)
+
+    # Volumes smaller than a tile along an axis are padded up to it
+    pad = [max(0, t - s) for t, s in zip(tile, shape)]
+    if any(pad):
+        source = F.pad(source[None, None], (0, pad[2], 0, pad[1], 0, pad[0]), mode="replicate")[0, 0]
+    padded_shape = tuple(source.shape)
+
+    weight = gaussian_weight(tile)
+    out_acc = feat_acc = None
+    weight_acc = torch.zeros(padded_shape, dtype=torch.float32)
+
+    for z in _tile_starts(padded_shape[0], tile[0], steps[0]):
+        for y in _tile_starts(padded_shape[1], tile[1], steps[1]):
+            for x in _tile_starts(padded_shape[2], tile[2], steps[2]):
+                window = (slice(z, z + tile[0]), slice(y, y + tile[1]), slice(x, x + tile[2]))
+                patch = source[window][None, None]
+
+                with torch.no_grad():
+                    output, features = forward(patch)
+                output = output[0].float()
+                features = features[0].float()
+
+                if out_acc is None:
+                    out_acc = torch.zeros((output.shape[0],) + padded_shape, dtype=torch.float32)
+                    feat_acc = torch.zeros((features.shape[0],) + padded_shape, dtype=torch.float32)
+
+                out_acc[(slice(None),) + window] += output * weight
+                feat_acc[(slice(None),) + window] += features * weight
+                weight_acc[window] += weight
+
+    out_acc /= weight_acc
+    feat_acc /= weight_acc
+    crop = (slice(None),) + tuple(slice(0, s) for s in shape)
+    out_acc = out_acc[crop]
+    feat_acc = feat_acc[crop]
+
+    def squeeze_channel(t: torch.Tensor) -> np.ndarray:
+        return np.ascontiguousarray((t[0] if t.shape[0] == 1 else t).numpy())
+
+    return squeeze_channel(out_acc), squeeze_channel(feat_acc)
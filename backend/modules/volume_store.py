@@ -0,0 +1,159 @@
+"""
+Canonical HDF5 volume layout:
+
+    /volume            full resolution (D, H, W), chunked
+    /pyramid/2, /4, /8 block-mean downsampled copies (attrs: factor, spacing)
+
+Chunked storage lets a reader decompress only the chunks a slice or region
+touches instead of the whole array.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence
+
+import h5py
+import numpy as np
+
+# -----------------------
+# Config
+# -----------------------
+H5_CODEC = os.getenv("H5_CODEC", "lzf").lower()        # lzf | gzip | blosc-lz4 | blosc-zstd | none
+H5_GZIP_LEVEL = int(os.getenv("H5_GZIP_LEVEL", "4"))
+H5_CHUNK = int(os.getenv("H5_CHUNK", "64"))             # edge of the cubic chunk
+H5_PYRAMID_LEVELS = int(os.getenv("H5_PYRAMID_LEVELS", "3"))  # 1/2, 1/4, 1/8
+H5_HANDLE_CACHE = int(os.getenv("H5_HANDLE_CACHE", "16"))     # open read handles kept by open_h5
+
+CODECS = ("lzf", "gzip", "blosc-lz4", "blosc-zstd", "none")
+
+
+def codec_options(codec: str = None) -> Dict:
+    """
+    h5py create_dataset keyword arguments for a codec. Blosc needs the
+    optional hdf5plugin package; without it the store falls back to LZF.
+    """
+    codec = (codec or H5_CODEC).lower()
+    if codec.startswith("blosc"):
+        try:
+            import hdf5plugin
+        except ImportError:
+            print(f"hdf5plugin is not installed; writing HDF5 with lzf instead of {codec}")
+            codec = "lzf"
+        else:
+            cname = codec.split("-", 1)[1] if "-" in codec else "lz4"
+            return dict(hdf5plugin.Blosc(cname=cname, clevel=5, shuffle=hdf5plugin.Blosc.SHUFFLE))
+
+    if codec == "gzip":
+        return {"compression": "gzip", "compression_opts": H5_GZIP_LEVEL, "shuffle": True}
+    if codec == "lzf":
+        return {"compression": "lzf", "shuffle": True}
+    return {}
+
+
+def chunk_shape(shape: Sequence[int], edge: int = None) -> tuple:
+    edge = edge or H5_CHUNK
+    return tuple(max(1, min(edge, int(s))) for s in shape)
+
+
+def downsample2(volume: np.ndarray) -> np.ndarray:
+    """2x block mean along every axis; odd edges are padded by repetition."""
+    pad = [(0, s % 2) for s in volume.shape]
+    if any(p[1] for p in pad):
+        volume = np.pad(volume, pad, mode="edge")
+    d, h, w = volume.shape
+    blocks = volume.reshape(d // 2, 2, h // 2, 2, w // 2, 2)
+    return blocks.mean(axis=(1, 3, 5), dtype=np.float32)
+
+
+def save_volume(
+    path: str,
+    volume: np.ndarray,
+    spacing,
+    series_uid: str,
+    codec: str = None,
+    chunk: int = None,
+    levels: int = None,
+) -> None:
+    """
+    Writes the full-resolution volume and its pyramid in one file. The file
+    is built under a temporary name and renamed into place, so readers
+    holding the previous version open (see open_h5) are never disturbed.
+    """
+    volume = np.ascontiguousarray(volume, dtype=np.float32)
+    options = codec_options(codec)
+    levels = H5_PYRAMID_LEVELS if levels is None else levels
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    with h5py.File(tmp_path, "w") as f:
+        dataset = f.create_dataset(
+            "volume", data=volume, chunks=chunk_shape(volume.shape, chunk), **options
+        )
+        # Intensity range lets volume transport quantise without a full pass
+        dataset.attrs["min"] = float(volume.min())
+        dataset.attrs["max"] = float(volume.max())
+        f.attrs["spacing"] = spacing
+        f.attrs["series_uid"] = series_uid.encode("utf-8")
+
+        pyramid = f.create_group("pyramid")
+        level = volume
+        for i in range(1, levels + 1):
+            if min(level.shape) < 2:
+                break
+            level = downsample2(level)
+            factor = 2 ** i
+            ds = pyramid.create_dataset(
+                str(factor), data=level, chunks=chunk_shape(level.shape, chunk), **options
+            )
+            ds.attrs["factor"] = factor
+            ds.attrs["spacing"] = [float(s) * factor for s in spacing]
+
+    os.replace(tmp_path, path)
+
+
+def pyramid_factors(f: h5py.File) -> List[int]:
+    """Downsampling factors stored in an open file (1 = full resolution)."""
+    factors = [1]
+    if "pyramid" in f:
+        factors += sorted(int(name) for name in f["pyramid"])
+    return factors
+
+
+def level_dataset(f: h5py.File, factor: int = 1) -> h5py.Dataset:
+    """Dataset for a pyramid factor; files written before the pyramid only have factor 1."""
+    if factor == 1:
+        return f["volume"]
+    if "pyramid" not in f or str(factor) not in f["pyramid"]:
+        raise KeyError(f"No pyramid level 1/{factor} in {f.filename}")
+    return f["pyramid"][str(factor)]
+
+
+# -----------------------
+# Open-handle cache
+# -----------------------
+_handles: "OrderedDict[tuple, h5py.File]" = OrderedDict()
+_handles_lock = threading.Lock()
+
+
+def open_h5(path: str) -> h5py.File:
+    """
+    Read-only handle from a small LRU keyed by (path, mtime), so scrolling
+    through a study does not reopen the file and re-read its metadata per
+    slice. Evicted handles are not closed explicitly: h5py closes them once
+    the last in-flight reader drops its reference.
+    """
+    key = (path, os.path.getmtime(path))
+    with _handles_lock:
+        handle = _handles.get(key)
+        if handle is not None:
+            _handles.move_to_end(key)
+            return handle
+
+    handle = h5py.File(path, "r")
+    with _handles_lock:
+        existing = _handles.get(key)
+        if existing is not None:
+            return existing
+        _handles[key] = handle
+        while len(_handles) > max(1, H5_HANDLE_CACHE):
+            _handles.popitem(last=False)
+    return handle
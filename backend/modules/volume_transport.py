@@ -0,0 +1,222 @@
+"""
+Raw binary transport for reconstructed volumes.
+
+Volumes are sent as little-endian uint8 / uint16 / float16 voxels in C order
+(z slowest), so a client that knows the shape from the JSON header can draw
+each axial slice as soon as its bytes arrive. Integer types are quantised
+linearly: value = raw * scale + offset.
+"""
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from io import BytesIO
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from backend.modules.volume_store import level_dataset, open_h5, pyramid_factors
+
+# -----------------------
+# Config
+# -----------------------
+VOLUME_SLAB_BYTES = int(os.getenv("VOLUME_SLAB_KB", "1024")) * 1024  # target bytes per streamed chunk
+VOLUME_GZIP_LEVEL = int(os.getenv("VOLUME_GZIP_LEVEL", "1"))
+
+DTYPES = {
+    "uint8": np.dtype("<u1"),
+    "uint16": np.dtype("<u2"),
+    "float16": np.dtype("<f2"),
+}
+
+
+class VolumeInfo:
+    """Shape, spacing and intensity range of an HDF5 volume (read once per file version)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        f = open_h5(path)
+        dataset = f["volume"]
+        self.shape = tuple(int(s) for s in dataset.shape)
+        self.spacing = tuple(float(s) for s in f.attrs.get("spacing", (1.0, 1.0, 1.0)))
+        self.factors = pyramid_factors(f)
+        uid = f.attrs.get("series_uid", b"")
+        self.series_uid = uid.decode("utf-8") if isinstance(uid, bytes) else str(uid)
+        if "min" in dataset.attrs and "max" in dataset.attrs:
+            self.low, self.high = float(dataset.attrs["min"]), float(dataset.attrs["max"])
+        else:
+            # Files written before the range was stored: one streamed pass
+            self.low, self.high = np.inf, -np.inf
+            for z0, z1 in _slabs(self.shape, 4, 0, self.shape[0]):
+                slab = dataset[z0:z1]
+                self.low = min(self.low, float(slab.min()))
+                self.high = max(self.high, float(slab.max()))
+
+    def scale_offset(self, dtype: str) -> Tuple[float, float]:
+        if dtype == "float16":
+            return 1.0, 0.0
+        levels = np.iinfo(DTYPES[dtype]).max
+        return max(self.high - self.low, 1e-12) / levels, self.low
+
+    def slice_bytes(self, dtype: str) -> int:
+        return self.shape[1] * self.shape[2] * DTYPES[dtype].itemsize
+
+    def byte_length(self, dtype: str) -> int:
+        return self.shape[0] * self.slice_bytes(dtype)
+
+    def header(self, dtype: str) -> dict:
+        scale, offset = self.scale_offset(dtype)
+        return {
+            "shape": list(self.shape),
+            "axes": "zyx",
+            "spacing": list(self.spacing),
+            "dtype": dtype,
+            "byte_order": "little",
+            "scale": scale,
+            "offset": offset,
+            "min": self.low,
+            "max": self.high,
+            "byte_length": self.byte_length(dtype),
+            "series_uid": self.series_uid,
+            "pyramid_factors": self.factors,
+        }
+
+
+_info_cache: "OrderedDict[Tuple[str, float], VolumeInfo]" = OrderedDict()
+_info_lock = threading.Lock()
+_INFO_CACHE_SIZE = 64
+
+
+def volume_info(path: str) -> VolumeInfo:
+    """Cached VolumeInfo keyed by path and mtime, so rewritten files are re-read."""
+    key = (path, os.path.getmtime(path))
+    with _info_lock:
+        info = _info_cache.get(key)
+        if info is not None:
+            _info_cache.move_to_end(key)
+            return info
+    info = VolumeInfo(path)
+    with _info_lock:
+        _info_cache[key] = info
+        while len(_info_cache) > _INFO_CACHE_SIZE:
+            _info_cache.popitem(last=False)
+    return info
+
+
+def _slabs(shape, itemsize: int, z_start: int, z_stop: int) -> Iterator[Tuple[int, int]]:
+    per_slice = max(1, shape[1] * shape[2] * itemsize)
+    step = max(1, VOLUME_SLAB_BYTES // per_slice)
+    for z0 in range(z_start, z_stop, step):
+        yield z0, min(z0 + step, z_stop)
+
+
+def encode(array: np.ndarray, dtype: str, scale: float, offset: float) -> np.ndarray:
+    """Converts voxels to the transport dtype (little-endian)."""
+    target = DTYPES[dtype]
+    if dtype == "float16":
+        return array.astype(target, copy=False)
+    levels = np.iinfo(target).max
+    quantised = (array - offset) / scale
+    np.clip(quantised, 0, levels, out=quantised)
+    return np.rint(quantised, out=quantised).astype(target)
+
+
+def iter_volume_bytes(
+    info: VolumeInfo, dtype: str, start: int = 0, end: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Yields bytes [start, end] (inclusive) of the encoded volume, reading
+    only the axial slabs that overlap the range.
+    """
+    total = info.byte_length(dtype)
+    end = total - 1 if end is None else min(end, total - 1)
+    slice_bytes = info.slice_bytes(dtype)
+    scale, offset = info.scale_offset(dtype)
+    z_start, z_stop = start // slice_bytes, end // slice_bytes + 1
+
+    dataset = open_h5(info.path)["volume"]
+    for z0, z1 in _slabs(info.shape, DTYPES[dtype].itemsize, z_start, z_stop):
+        slab = np.asarray(dataset[z0:z1], dtype=np.float32)
+        data = memoryview(encode(slab, dtype, scale, offset)).cast("B")
+        base = z0 * slice_bytes
+        lo = max(start - base, 0)
+        hi = min(end - base + 1, len(data))
+        yield bytes(data[lo:hi])
+
+
+# Viewer plane name -> array axis of the (z, y, x) volume
+PLANES = {"axial": 0, "coronal": 1, "sagittal": 2}
+
+
+def read_slice(info: VolumeInfo, plane: str, index: int, factor: int = 1) -> np.ndarray:
+    """One 2D plane of a pyramid level; only the chunks it crosses are decompressed."""
+    dataset = level_dataset(open_h5(info.path), factor)
+    axis = PLANES[plane]
+    if not 0 <= index < dataset.shape[axis]:
+        raise IndexError(f"{plane} index {index} outside 0..{dataset.shape[axis] - 1}")
+    selection = [slice(None)] * 3
+    selection[axis] = index
+    return np.asarray(dataset[tuple(selection)], dtype=np.float32)
+
+
+def read_region(info: VolumeInfo, box: Sequence[Tuple[int, int]], factor: int = 1) -> np.ndarray:
+    """Sub-box [(z0, z1), (y0, y1), (x0, x1)] (half-open, clipped) of a pyramid level."""
+    dataset = level_dataset(open_h5(info.path), factor)
+    selection = tuple(
+        slice(max(0, lo), min(hi, size)) for (lo, hi), size in zip(box, dataset.shape)
+    )
+    if any(s.start >= s.stop for s in selection):
+        raise IndexError("Region is empty after clipping to the volume bounds")
+    return np.asarray(dataset[selection], dtype=np.float32)
+
+
+def encode_png(plane: np.ndarray, low: float, high: float) -> bytes:
+    """Window a 2D plane to 8-bit grayscale PNG."""
+    scaled = (plane - low) * (255.0 / max(high - low, 1e-12))
+    image = Image.fromarray(np.clip(scaled, 0, 255).astype(np.uint8))
+    buf = BytesIO()
+    image.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
+
+
+def iter_gzip(chunks: Iterable[bytes], level: int = None) -> Iterator[bytes]:
+    """Streams chunks through one gzip member without buffering the whole payload."""
+    compressor = zlib.compressobj(VOLUME_GZIP_LEVEL if level is None else level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """True when the client lists gzip (or *) without q=0."""
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            q = params.strip()
+            return not (q.startswith("q=") and float(q[2:] or 0) == 0)
+    return False
+
+
+def encode_array(volume: np.ndarray, dtype: str = "float16") -> Tuple[dict, bytes]:
+    """In-memory variant for arrays that are not stored as HDF5: (header, raw bytes)."""
+    volume = np.asarray(volume, dtype=np.float32)
+    low, high = float(volume.min()), float(volume.max())
+    if dtype == "float16":
+        scale, offset = 1.0, 0.0
+    else:
+        scale, offset = max(high - low, 1e-12) / np.iinfo(DTYPES[dtype]).max, low
+    payload = encode(volume, dtype, scale, offset).tobytes()
+    header = {
+        "shape": list(volume.shape),
+        "dtype": dtype,
+        "byte_order": "little",
+        "scale": scale,
+        "offset": offset,
+        "min": low,
+        "max": high,
+        "byte_length": len(payload),
+    }
+    return header, payload
@@ -4,23 +4,57 @@ from torchvision import transforms
 import os
 
 from backend.models.cnn_model import XRayCNN
+from backend.modules.batching import MicroBatcher, batcher_settings
+from backend.modules.inference_backend import backend_for, load_ort_if_selected
+from backend.modules.model_registry import registry
+from backend.modules.quantization import int8_path, load_quantized, precision_for
+from backend.modules.result_cache import model_fingerprint, result_cache
 
 # -----------------------
-# Load model ONCE
+# Model (loaded once per process via the registry)
 # -----------------------
 device = torch.device('cpu')
+XRAY_MODEL_PATH = "backend/models/xray_model.pth"
+XRAY_MODEL_VERSION = "xray-v1"
 
-model = XRayCNN()
 
-state_dict = torch.load(
-    "backend/models/xray_model.pth", 
-    map_location=device, 
-    weights_only=True
-)
+XRAY_PRECISION = precision_for("xray")
+
+
+def _load_xray_model():
+    # XRAY_BACKEND=ort serves the exported ONNX graph from training/export_onnx.py
+    ort_model = load_ort_if_selected("xray")
+    if ort_model is not None:
+        return ort_model
+
+    # XRAY_PRECISION=int8 serves the calibrated model from training/quantize.py
+    if XRAY_PRECISION == "int8":
+        quantized_path = int8_path(XRAY_MODEL_PATH)
+        if os.path.exists(quantized_path):
+            return load_quantized(quantized_path)
+        print(f"{quantized_path} not found, serving fp32 X-ray model")
+
+    return _build_xray_model()
+
+
+def _build_xray_model() -> XRayCNN:
+    model = XRayCNN()
+    state_dict = torch.load(
+        XRAY_MODEL_PATH,
+        map_location=device,
+        weights_only=True
+    )
+    model.load_state_dict(state_dict)
+    model.to(device)
+    model.eval()
+    return model
+
 
-model.load_state_dict(state_dict)
-model.to(device)
-model.eval()
+registry.register(
+    "xray",
+    _load_xray_model,
+    example_input=lambda: torch.zeros(1, 3, 224, 224, device=device),
+)
 # -----------------------
 # Image preprocessing
 # -----------------------
@@ -30,16 +64,44 @@ transform = transforms.Compose([
     transforms.ToTensor()
 ])
 
+# -----------------------
+# Micro-batching
+# -----------------------
+# Concurrent requests arriving within XRAY_BATCH_MAX_WAIT_MS (or until
+# XRAY_BATCH_MAX_SIZE images are queued) share one forward pass.
+batcher = MicroBatcher(
+    lambda batch: registry.get("xray")(batch.to(device)).view(-1),
+    name="xray",
+    **batcher_settings("XRAY"),
+)
+
 # -----------------------
 # Prediction function
 # -----------------------
-def analyze_xray(image_path: str):
+def analyze_xray(image_path: str, digest: str = None):
+    """
+    Classifies one X-ray. Identical uploads (same bytes, same weights) are
+    served from the result cache.
+    """
+    return result_cache.get_or_compute(
+        "xray",
+        model_fingerprint(
+            f"{XRAY_MODEL_VERSION}-{XRAY_PRECISION}-{backend_for('xray')}",
+            XRAY_MODEL_PATH,
+            int8_path(XRAY_MODEL_PATH),
+        ),
+        image_path,
+        lambda: _predict_xray(image_path),
+        digest=digest,
+    )
+
+
+def _predict_xray(image_path: str):
     image = Image.open(image_path).convert("L")
-    image = transform(image).unsqueeze(0).to(device)
+    image = transform(image)
 
-    with torch.no_grad():
-        logits = model(image)
-        prob_pneumonia = torch.sigmoid(logits).item()
+    logit = batcher.infer(image)
+    prob_pneumonia = torch.sigmoid(logit).item()
 
     label = "PNEUMONIA" if prob_pneumonia >= 0.5 else "NORMAL"
     confidence = prob_pneumonia if label == "PNEUMONIA" else 1 - prob_pneumonia
@@ -69,7 +131,7 @@ def analyze_xray(image_path: str):
         },
         "model_info": {
             "architecture": "CNN (ResNet-based)",
-            "version": "xray-v1"
+            "version": XRAY_MODEL_VERSION
         },
         "disclaimer": "This AI system is for research and decision support only."
     }
@@ -2,19 +2,24 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel, EmailStr
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 import os
 import re
 
-from backend.data.scan_database import get_db
+from backend.data.scan_database import get_async_db, get_db
 from backend.models.doctor import Doctor
 from backend.models.patient import Patient
 from backend.models.user import User
+from backend.auth.principal import Principal, principal_cache
+from backend.modules.stats_cache import dashboard_cache
 from backend.auth.security import (
     create_access_token,
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_and_update_async,
+    verify_password_async,
 )
 
 router = APIRouter()
@@ -57,13 +62,25 @@ def _validate_password(password: str) -> None:
             detail="Password must include at least one digit.",
         )
 
+async def _user_by_email(db: AsyncSession, email: str):
+    return (await db.execute(select(User).where(User.email == email))).scalars().first()
+
+
 @router.post("/login")
-def login(payload: LoginPayload, db: Session = Depends(get_db)):
+async def login(payload: LoginPayload, db: AsyncSession = Depends(get_async_db)):
     email = payload.email.strip().lower()
-    user = db.query(User).filter(User.email == email).first()
+    user = await _user_by_email(db, email)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    if not user or not verify_password(payload.password, user.password_hash):
+    # Hashing runs on the bounded password pool, not the request threadpool
+    valid, new_hash = await verify_and_update_async(payload.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    if new_hash:
+        # Stored hash used an outdated cost (PASSWORD_HASH_ROUNDS); upgrade it transparently
+        user.password_hash = new_hash
+        await db.commit()
 
     token = create_access_token({"sub": str(user.id), "role": user.role})
 
@@ -81,9 +98,9 @@ def login(payload: LoginPayload, db: Session = Depends(get_db)):
 
 
 @router.post("/register")
-def register(payload: RegisterPayload, db: Session = Depends(get_db)):
+async def register(payload: RegisterPayload, db: AsyncSession = Depends(get_async_db)):
     email = payload.email.strip().lower()
-    existing = db.query(User).filter(User.email == email).first()
+    existing = await _user_by_email(db, email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered.")
 
@@ -97,19 +114,19 @@ def register(payload: RegisterPayload, db: Session = Depends(get_db)):
     patient_id = None
 
     if role == "doctor":
-        doctor = db.query(Doctor).filter(Doctor.email == email).first()
+        doctor = (
+            await db.execute(select(Doctor).where(Doctor.email == email))
+        ).scalars().first()
         if not doctor:
             doctor = Doctor(full_name=payload.full_name, email=email)
             db.add(doctor)
-            db.commit()
-            db.refresh(doctor)
+            await db.commit()
+            await db.refresh(doctor)
         doctor_id = doctor.id
     elif role == "patient":
         doctor_ref = None
         if payload.doctor_id is not None:
-            doctor_ref = (
-                db.query(Doctor).filter(Doctor.id == payload.doctor_id).first()
-            )
+            doctor_ref = await db.get(Doctor, payload.doctor_id)
             if not doctor_ref:
                 raise HTTPException(status_code=404, detail="Doctor not found.")
 
@@ -123,21 +140,22 @@ def register(payload: RegisterPayload, db: Session = Depends(get_db)):
             doctor_id=doctor_ref.id if doctor_ref else None,
         )
         db.add(patient)
-        db.commit()
-        db.refresh(patient)
+        await db.commit()
+        dashboard_cache.invalidate()
+        await db.refresh(patient)
         patient_id = patient.id
 
     user = User(
         email=email,
-        password_hash=hash_password(payload.password),
+        password_hash=await hash_password_async(payload.password),
         role=role,
         full_name=payload.full_name,
         doctor_id=doctor_id,
         patient_id=patient_id,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     token = create_access_token({"sub": str(user.id), "role": user.role})
     return {
@@ -152,22 +170,33 @@ def register(payload: RegisterPayload, db: Session = Depends(get_db)):
         },
     }
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Resolves the bearer token to an immutable Principal. The users table is
+    only queried on a principal cache miss.
+    """
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
+        user_id = int(user_id)
+    except (JWTError, ValueError):
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.put(principal)
+    return principal
 
 @router.get("/me")
-def me(current: User = Depends(get_current_user)):
+def me(current: Principal = Depends(get_current_user)):
     return {
         "id": str(current.id),
         "role": current.role,
@@ -179,16 +208,19 @@ def me(current: User = Depends(get_current_user)):
 
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     payload: ChangePasswordPayload,
-    current: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    if not verify_password(payload.current_password, current.password_hash):
+    user = await db.get(User, current.id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    if not await verify_password_async(payload.current_password, user.password_hash):
         raise HTTPException(status_code=400, detail="Current password is incorrect.")
     _validate_password(payload.new_password)
 
-    current.password_hash = hash_password(payload.new_password)
-    db.add(current)
-    db.commit()
+    user.password_hash = await hash_password_async(payload.new_password)
+    await db.commit()
+    principal_cache.invalidate(user.id)
     return {"success": True}
@@ -1,88 +1,110 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import case, func, desc
 from typing import List, Dict, Any
 
 # Import your database session and models
-from backend.data.scan_database import get_db
+from backend.data.scan_database import get_async_db
 from backend.models.scan import Scan
 from backend.models.patient import Patient
+from backend.modules.stats_cache import dashboard_cache
 
 router = APIRouter()
 
-@router.get("/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
-    """
-    Fetch aggregated statistics for the General Dashboard.
-    """
-    try:
-        # 1. Basic Counts
-        total_patients = db.query(Patient).count()
-        total_scans = db.query(Scan).count()
-        
-        # 2. Status Counts (Active/Processing vs Completed)
-        active_scans = db.query(Scan).filter(Scan.status == "processing").count()
-        
-        # 3. Critical Cases (assuming 'High' risk level or specific diagnosis)
+def _compute_dashboard_stats(db: Session) -> Dict[str, Any]:
+    # 1. One aggregate pass over scans: counts per (risk level, modality),
+    #    with processing scans counted alongside. Every scan counter and
+    #    distribution below is derived from these rows.
+    rows = db.query(
+        Scan.risk_level,
+        Scan.modality,
+        func.count(Scan.id),
+        func.sum(case((Scan.status == "processing", 1), else_=0)),
+    ).group_by(Scan.risk_level, Scan.modality).all()
+
+    total_scans = 0
+    active_scans = 0
+    critical_cases = 0
+    risk_counts: Dict[Any, int] = {}
+    modality_counts: Dict[Any, int] = {}
+
+    for risk_level, modality, count, processing in rows:
+        total_scans += count
+        active_scans += processing or 0
         # You might need to adjust "High" to match your exact database values
-        critical_cases = db.query(Scan).filter(Scan.risk_level == "High").count()
+        if risk_level == "High":
+            critical_cases += count
+        risk_counts[risk_level] = risk_counts.get(risk_level, 0) + count
+        modality_counts[modality] = modality_counts.get(modality, 0) + count
+
+    # 2. Risk Distribution for the Chart
+    risk_distribution = [
+        {"name": level if level else "Unknown", "value": count}
+        for level, count in risk_counts.items()
+    ]
 
-        # 4. Risk Distribution for the Chart
-        # Groups scans by risk level and counts them
-        risk_query = db.query(
-            Scan.risk_level, func.count(Scan.id)
-        ).group_by(Scan.risk_level).all()
-        
-        risk_distribution = [
-            {"name": level if level else "Unknown", "value": count}
-            for level, count in risk_query
-        ]
+    # 3. Scan Coverage (grouped by scan type)
+    scan_coverage = [
+        {"subject": s_type if s_type else "Other", "A": count, "fullMark": 150}
+        for s_type, count in sorted(
+            modality_counts.items(), key=lambda item: (item[0] is not None, item[0] or "")
+        )
+    ]
 
-        # 5. Recent Scans (Limit 5)
-        # We join with Patient to get the patient's name
-        recent_scans_query = db.query(Scan, Patient).join(
-            Patient, Scan.patient_id == Patient.id
-        ).order_by(desc(Scan.created_at)).limit(5).all()
+    # 4. Patients
+    total_patients = db.query(func.count(Patient.id)).scalar() or 0
 
-        recent_scans = []
-        for scan, patient in recent_scans_query:
-            patient_name = patient.full_name
-            if not patient_name:
-                patient_name = " ".join(
-                    part for part in [patient.first_name, patient.last_name] if part
-                ).strip() or "Unknown"
-            recent_scans.append({
-                "id": scan.id,
-                "patient_name": patient_name,
-                "type": scan.modality,
-                "date": scan.created_at.strftime("%Y-%m-%d") if scan.created_at else "N/A",
-                "status": scan.status,
-                "risk": scan.risk_level
-            })
+    # 5. Recent Scans (Limit 5)
+    # We join with Patient to get the patient's name
+    recent_scans_query = db.query(Scan, Patient).join(
+        Patient, Scan.patient_id == Patient.id
+    ).order_by(desc(Scan.created_at)).limit(5).all()
 
-        # 6. Scan Coverage (e.g., by Body Part or Date)
-        # This example groups by scan type/body part
-        coverage_query = db.query(
-            Scan.modality, func.count(Scan.id)
-        ).group_by(Scan.modality).all()
-        
-        scan_coverage = [
-            {"subject": s_type if s_type else "Other", "A": count, "fullMark": 150}
-            for s_type, count in coverage_query
-        ]
+    recent_scans = []
+    for scan, patient in recent_scans_query:
+        patient_name = patient.full_name
+        if not patient_name:
+            patient_name = " ".join(
+                part for part in [patient.first_name, patient.last_name] if part
+            ).strip() or "Unknown"
+        recent_scans.append({
+            "id": scan.id,
+            "patient_name": patient_name,
+            "type": scan.modality,
+            "date": scan.created_at.strftime("%Y-%m-%d") if scan.created_at else "N/A",
+            "status": scan.status,
+            "risk": scan.risk_level
+        })
 
-        return {
-            "stats": {
-                "totalPatients": total_patients,
-                "totalScans": total_scans,
-                "activeScans": active_scans,
-                "criticalCases": critical_cases,
-            },
-            "riskDistribution": risk_distribution,
-            "scanCoverage": scan_coverage,
-            "recentScans": recent_scans
-        }
+    return {
+        "stats": {
+            "totalPatients": total_patients,
+            "totalScans": total_scans,
+            "activeScans": active_scans,
+            "criticalCases": critical_cases,
+        },
+        "riskDistribution": risk_distribution,
+        "scanCoverage": scan_coverage,
+        "recentScans": recent_scans
+    }
 
+
+@router.get("/stats")
+async def get_dashboard_stats(db: AsyncSession = Depends(get_async_db)):
+    """
+    Fetch aggregated statistics for the General Dashboard.
+    Served from an in-process cache (DASHBOARD_CACHE_TTL seconds) that scan
+    writes invalidate; concurrent misses share one recomputation, run on
+    the async connection via run_sync.
+    """
+    try:
+        return await dashboard_cache.get_async(lambda: db.run_sync(_compute_dashboard_stats))
     except Exception as e:
         print(f"Error fetching dashboard stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats/cache")
+def get_dashboard_cache_stats():
+    return dashboard_cache.stats()
@@ -2,12 +2,14 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.data.scan_database import get_db
+from backend.data.scan_database import get_async_db, get_db
 from backend.models.doctor import Doctor
 from backend.models.patient import Patient
-from backend.models.user import User
+from backend.auth.principal import Principal
 from backend.routes.auth_router import get_current_user
 
 router = APIRouter()
@@ -71,14 +73,14 @@ def create_doctor(payload: DoctorCreate, db: Session = Depends(get_db)):
 
 
 @router.get("")
-def list_doctors(db: Session = Depends(get_db)):
-    doctors = db.query(Doctor).order_by(Doctor.id).all()
+async def list_doctors(db: AsyncSession = Depends(get_async_db)):
+    doctors = (await db.execute(select(Doctor).order_by(Doctor.id))).scalars().all()
     return [_serialize_doctor(doctor) for doctor in doctors]
 
 
 @router.get("/{doctor_id}")
-def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
-    doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
+async def get_doctor(doctor_id: int, db: AsyncSession = Depends(get_async_db)):
+    doctor = await db.get(Doctor, doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found.")
     return _serialize_doctor(doctor)
@@ -114,18 +116,17 @@ def update_doctor(
 
 
 @router.get("/{doctor_id}/patients")
-def list_doctor_patients(doctor_id: int, db: Session = Depends(get_db)):
-    doctor = db.query(Doctor).filter(Doctor.id == doctor_id).first()
+async def list_doctor_patients(doctor_id: int, db: AsyncSession = Depends(get_async_db)):
+    doctor = await db.get(Doctor, doctor_id)
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found.")
 
-    patients = (
-        db.query(Patient).filter(Patient.doctor_id == doctor_id).order_by(Patient.id).all()
-    )
+    query = select(Patient).where(Patient.doctor_id == doctor_id).order_by(Patient.id)
+    patients = (await db.execute(query)).scalars().all()
     return [_serialize_patient(patient) for patient in patients]
 
 
-def _require_doctor(current: User) -> int:
+def _require_doctor(current: Principal) -> int:
     if current.role != "doctor" or current.doctor_id is None:
         raise HTTPException(status_code=403, detail="Doctor access required.")
     return current.doctor_id
@@ -135,7 +136,7 @@ def _require_doctor(current: User) -> int:
 def claim_patient(
     patient_id: int,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: Principal = Depends(get_current_user),
 ):
     doctor_id = _require_doctor(current)
     patient = db.query(Patient).filter(Patient.id == patient_id).first()
@@ -155,7 +156,7 @@ def claim_patient(
 def unassign_patient(
     patient_id: int,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: Principal = Depends(get_current_user),
 ):
     doctor_id = _require_doctor(current)
     patient = db.query(Patient).filter(Patient.id == patient_id).first()
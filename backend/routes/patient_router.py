@@ -3,11 +3,14 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.data.scan_database import get_db
+from backend.data.scan_database import get_async_db, get_db
 from backend.models.doctor import Doctor
 from backend.models.patient import Patient
+from backend.modules.stats_cache import dashboard_cache
 
 router = APIRouter()
 
@@ -72,24 +75,25 @@ def create_patient(payload: PatientCreate, db: Session = Depends(get_db)):
     patient = Patient(**data)
     db.add(patient)
     db.commit()
+    dashboard_cache.invalidate()
     db.refresh(patient)
     return _serialize_patient(patient)
 
 
 @router.get("")
-def list_patients(
-    unassigned: Optional[bool] = None, db: Session = Depends(get_db)
+async def list_patients(
+    unassigned: Optional[bool] = None, db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Patient)
+    query = select(Patient)
     if unassigned is True:
-        query = query.filter(Patient.doctor_id == None)  # noqa: E711
-    patients = query.order_by(Patient.id).all()
+        query = query.where(Patient.doctor_id == None)  # noqa: E711
+    patients = (await db.execute(query.order_by(Patient.id))).scalars().all()
     return [_serialize_patient(patient) for patient in patients]
 
 
 @router.get("/{patient_id}")
-def get_patient(patient_id: int, db: Session = Depends(get_db)):
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+async def get_patient(patient_id: int, db: AsyncSession = Depends(get_async_db)):
+    patient = await db.get(Patient, patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found.")
     return _serialize_patient(patient)
@@ -122,5 +126,7 @@ def update_patient(
 
     db.add(patient)
     db.commit()
+    # Cached recentScans carry patient names
+    dashboard_cache.invalidate()
     db.refresh(patient)
     return _serialize_patient(patient)
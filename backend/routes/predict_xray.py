@@ -1,4 +1,5 @@
 from fastapi import APIRouter, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 import tempfile
 import os
 # from fastapi import APIRouter, UploadFile, File, HTTPException
@@ -6,25 +7,32 @@ import os
 # import os
 # from pathlib import Path
 
-from backend.modules.xray_service import analyze_xray
+from backend.modules.xray_service import analyze_xray, batcher
+from backend.utils.file_handler import save_upload
 
 router = APIRouter()
 
 @router.post("/predict/xray")
 async def predict_xray(file: UploadFile = File(...)):
-    # Save image temporarily
+    # Save image temporarily (streamed to disk in chunks, hashed on the way)
     with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-        tmp.write(await file.read())
         tmp_path = tmp.name
+    saved = await save_upload(file, tmp_path)
 
-    # Pass FILE PATH
-    result = analyze_xray(tmp_path)
+    # Pass FILE PATH (off the event loop so concurrent requests can be batched)
+    result = await run_in_threadpool(analyze_xray, tmp_path, saved.sha256)
 
     return {
         "filename": file.filename,
         **result
     }
 
+
+@router.get("/predict/xray/batching")
+def xray_batching_stats():
+    """Batch-size histogram and latency counters for tuning the X-ray batcher."""
+    return batcher.stats()
+
 # @router.post("/predict/xray")
 # async def predict_xray(file: UploadFile = File(...)):
 #     if not file:
@@ -1,23 +1,29 @@
 from __future__ import annotations
 
+import base64
 import json
+import os
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile
 from pydantic import BaseModel
-from sqlalchemy import desc
-from sqlalchemy.orm import Session
+from sqlalchemy import String, and_, desc, or_, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
 
-from backend.data.scan_database import get_db
+from backend.data.scan_database import SessionLocal, get_async_db, get_db
 from backend.models.scan import Scan
 from backend.models.patient import Patient
-from backend.models.user import User
+from backend.auth.principal import Principal
 from backend.routes.auth_router import get_current_user
-from backend.modules.mri_service import analyze_dicom_zip as analyze_mri
+from backend.modules.mri_executor import mri_executor
 from backend.modules.xray_service import analyze_xray
+from backend.modules.scan_jobs import QueueFullError, scan_jobs
+from backend.modules.stats_cache import dashboard_cache
+from backend.utils.file_handler import save_upload
 
 router = APIRouter()
 
@@ -29,34 +35,84 @@ def _safe_slug(value: str, fallback: str = "unknown") -> str:
     return cleaned or fallback
 
 
-def _serialize_scan(scan: Scan) -> dict[str, Any]:
-    def parse_json(raw: Optional[str]) -> Any:
-        if not raw:
-            return None
-        try:
-            return json.loads(raw)
-        except json.JSONDecodeError:
-            return None
-
-    return {
-        "id": scan.id,
-        "patient_id": scan.patient_id,
-        "doctor_id": scan.doctor_id,
-        "modality": scan.modality,
-        "file_path": scan.file_path,
-        "created_at": scan.created_at,
-        "updated_at": scan.updated_at,
-        "status": scan.status,
-        "risk_level": scan.risk_level,
-        "ai_result": parse_json(scan.ai_result_json),
-        "summary": parse_json(scan.summary_json),
-        "original_filename": scan.original_filename,
-        "review_status": scan.review_status,
-        "clinician_note": scan.clinician_note,
-    }
-
-
-def _ensure_scan_access(scan: Scan, current: User, db: Session) -> None:
+def _parse_json(raw: Optional[str]) -> Any:
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+
+
+# Response field -> (column to load, value getter)
+SCAN_FIELDS: dict[str, tuple[Any, Any]] = {
+    "id": (Scan.id, lambda s: s.id),
+    "patient_id": (Scan.patient_id, lambda s: s.patient_id),
+    "doctor_id": (Scan.doctor_id, lambda s: s.doctor_id),
+    "modality": (Scan.modality, lambda s: s.modality),
+    "file_path": (Scan.file_path, lambda s: s.file_path),
+    "created_at": (Scan.created_at, lambda s: s.created_at),
+    "updated_at": (Scan.updated_at, lambda s: s.updated_at),
+    "status": (Scan.status, lambda s: s.status),
+    "risk_level": (Scan.risk_level, lambda s: s.risk_level),
+    "ai_result": (Scan.ai_result_json, lambda s: _parse_json(s.ai_result_json)),
+    "summary": (Scan.summary_json, lambda s: _parse_json(s.summary_json)),
+    "original_filename": (Scan.original_filename, lambda s: s.original_filename),
+    "review_status": (Scan.review_status, lambda s: s.review_status),
+    "clinician_note": (Scan.clinician_note, lambda s: s.clinician_note),
+}
+
+# Columns the scan list views actually render (no large JSON blobs)
+SUMMARY_FIELDS = (
+    "id",
+    "patient_id",
+    "doctor_id",
+    "modality",
+    "created_at",
+    "updated_at",
+    "status",
+    "risk_level",
+    "original_filename",
+    "review_status",
+)
+
+SCANS_PAGE_SIZE = int(os.getenv("SCANS_PAGE_SIZE", "100"))
+SCANS_MAX_PAGE_SIZE = 500
+
+
+def _serialize_scan(scan: Scan, fields: Optional[Iterable[str]] = None) -> dict[str, Any]:
+    names = fields if fields is not None else SCAN_FIELDS.keys()
+    return {name: SCAN_FIELDS[name][1](scan) for name in names}
+
+
+def _encode_cursor(created_at: str, scan_id: int) -> str:
+    raw = f"{created_at}|{scan_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, scan_id = raw.rsplit("|", 1)
+        datetime.fromisoformat(created_at)
+        return created_at, int(scan_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor.") from exc
+
+
+def _created_at_column(dialect: str) -> Any:
+    """
+    Expression the scan list orders and pages by. SQLite keeps DateTime as
+    text in more than one form ("YYYY-MM-DD HH:MM:SS" from CURRENT_TIMESTAMP,
+    "...SS.ffffff" from SQLAlchemy binds) and orders by that text, so the
+    cursor carries the stored text verbatim and is compared as text.
+    """
+    if dialect == "sqlite":
+        return type_coerce(Scan.created_at, String)
+    return Scan.created_at
+
+
+def _ensure_scan_access(scan: Scan, current: Principal, db: Session) -> None:
     if current.role == "patient":
         if current.patient_id is None or scan.patient_id != current.patient_id:
             raise HTTPException(status_code=403, detail="Not authorized.")
@@ -147,7 +203,78 @@ def _build_xray_summary(result: dict) -> dict[str, Any]:
     }
 
 
-@router.post("/upload-and-predict")
+def _run_prediction_job(
+    scan_id: int, target_path: str, modality: str, digest: Optional[str] = None
+) -> None:
+    """
+    Background worker: moves a scan through uploaded -> processing -> predicted/failed.
+    Runs on the scan job pool with its own DB session.
+    """
+    db = SessionLocal()
+    try:
+        scan = db.query(Scan).filter(Scan.id == scan_id).first()
+        if not scan:
+            return
+
+        scan.status = "processing"
+        scan.updated_at = datetime.utcnow()
+        db.commit()
+        dashboard_cache.invalidate()
+
+        try:
+            if modality == "mri":
+                result = mri_executor.run(target_path, digest=digest)
+                summary = _build_mri_summary(result)
+            else:
+                result = analyze_xray(target_path, digest=digest)
+                summary = _build_xray_summary(result)
+        except FileNotFoundError as exc:
+            scan.status = "failed"
+            scan.summary_json = json.dumps({"error": str(exc)})
+            scan.updated_at = datetime.utcnow()
+            db.commit()
+            dashboard_cache.invalidate()
+            raise
+        except Exception as exc:
+            scan.status = "failed"
+            scan.summary_json = json.dumps({"error": f"Prediction failed: {exc}"})
+            scan.updated_at = datetime.utcnow()
+            db.commit()
+            dashboard_cache.invalidate()
+            raise
+
+        scan.status = "predicted"
+        scan.ai_result_json = json.dumps(result)
+        scan.summary_json = json.dumps(summary)
+        scan.updated_at = datetime.utcnow()
+        db.commit()
+        dashboard_cache.invalidate()
+    finally:
+        db.close()
+
+
+def fail_cancelled_scans(scan_ids: list[int]) -> None:
+    """Marks scans whose queued job was cancelled at shutdown as failed."""
+    db = SessionLocal()
+    try:
+        scans = (
+            db.query(Scan)
+            .filter(Scan.id.in_(scan_ids), Scan.status == "uploaded")
+            .all()
+        )
+        for scan in scans:
+            scan.status = "failed"
+            scan.summary_json = json.dumps(
+                {"error": "Prediction was cancelled by a server shutdown; upload the scan again."}
+            )
+            scan.updated_at = datetime.utcnow()
+        db.commit()
+        dashboard_cache.invalidate()
+    finally:
+        db.close()
+
+
+@router.post("/upload-and-predict", status_code=202)
 async def upload_and_predict(
     file: UploadFile = File(...),
     patient_id: int = Form(...),
@@ -177,8 +304,7 @@ async def upload_and_predict(
     target_dir.mkdir(parents=True, exist_ok=True)
     target_path = target_dir / filename
 
-    contents = await file.read()
-    target_path.write_bytes(contents)
+    saved = await save_upload(file, str(target_path))
 
     relative_path = Path("uploads") / "scans" / safe_patient / filename
 
@@ -193,57 +319,132 @@ async def upload_and_predict(
     )
     db.add(scan)
     db.commit()
+    dashboard_cache.invalidate()
     db.refresh(scan)
 
     try:
-        if modality_norm == "mri":
-            result = analyze_mri(str(target_path))
-            summary = _build_mri_summary(result)
-        else:
-            result = analyze_xray(str(target_path))
-            summary = _build_xray_summary(result)
-    except FileNotFoundError as exc:
+        scan_jobs.submit(
+            scan.id, _run_prediction_job, str(target_path), modality_norm, saved.sha256
+        )
+    except QueueFullError as exc:
         scan.status = "failed"
         scan.summary_json = json.dumps({"error": str(exc)})
         db.commit()
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
-    except Exception as exc:
-        scan.status = "failed"
-        scan.summary_json = json.dumps({"error": f"Prediction failed: {exc}"})
-        db.commit()
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {exc}") from exc
+        dashboard_cache.invalidate()
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
 
-    scan.status = "predicted"
-    scan.ai_result_json = json.dumps(result)
-    scan.summary_json = json.dumps(summary)
-    db.commit()
-    db.refresh(scan)
+    return {
+        "id": scan.id,
+        "status": scan.status,
+        "status_url": f"/api/scans/{scan.id}/status",
+    }
 
-    return _serialize_scan(scan)
+
+@router.get("/jobs")
+def scan_job_stats():
+    """Worker pool occupancy for the upload-and-predict queue."""
+    return scan_jobs.stats()
+
+
+@router.get("/{scan_id}/status")
+async def get_scan_status(scan_id: int, db: AsyncSession = Depends(get_async_db)):
+    scan = await db.get(Scan, scan_id)
+    if not scan:
+        raise HTTPException(status_code=404, detail="Scan not found.")
+
+    error = None
+    if scan.status == "failed" and scan.summary_json:
+        try:
+            error = json.loads(scan.summary_json).get("error")
+        except (json.JSONDecodeError, AttributeError):
+            error = None
+
+    return {
+        "id": scan.id,
+        "status": scan.status,
+        "queued": scan_jobs.is_queued(scan.id),
+        "updated_at": scan.updated_at,
+        "error": error,
+    }
 
 
 @router.get("")
-def list_scans(
+async def list_scans(
+    response: Response,
     patient_id: Optional[int] = None,
     doctor_id: Optional[int] = None,
     modality: Optional[str] = None,
-    db: Session = Depends(get_db),
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: str = "full",
+    db: AsyncSession = Depends(get_async_db),
 ):
-    query = db.query(Scan)
+    """
+    Newest-first scan list with keyset pagination on (created_at, id).
+    Paging starts when `limit` or `cursor` is given (SCANS_PAGE_SIZE rows by
+    default); without either, every matching scan is returned as before.
+    Pass the X-Next-Cursor response header back as `cursor` for the next page.
+    `fields=id,status,...` or `view=summary` restrict the columns loaded, so
+    the ai_result/summary JSON is only read and parsed when asked for.
+    """
+    if fields:
+        selected = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in selected if name not in SCAN_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+    elif view == "summary":
+        selected = list(SUMMARY_FIELDS)
+    elif view == "full":
+        selected = list(SCAN_FIELDS)
+    else:
+        raise HTTPException(status_code=400, detail="view must be 'full' or 'summary'.")
+
+    paginate = limit is not None or cursor is not None
+    if paginate:
+        limit = max(1, min(limit or SCANS_PAGE_SIZE, SCANS_MAX_PAGE_SIZE))
+
+    # id/created_at are always needed to build the next cursor
+    columns = {SCAN_FIELDS[name][0] for name in selected} | {Scan.id, Scan.created_at}
+    dialect = db.bind.dialect.name
+    created_col = _created_at_column(dialect)
+    query = select(Scan, created_col.label("cursor_created_at")).options(load_only(*columns))
     if patient_id:
-        query = query.filter(Scan.patient_id == patient_id)
+        query = query.where(Scan.patient_id == patient_id)
     if doctor_id:
-        query = query.filter(Scan.doctor_id == doctor_id)
+        query = query.where(Scan.doctor_id == doctor_id)
     if modality:
-        query = query.filter(Scan.modality == modality.lower())
+        query = query.where(Scan.modality == modality.lower())
+    if cursor:
+        created_value, cursor_id = _decode_cursor(cursor)
+        if dialect != "sqlite":
+            created_value = datetime.fromisoformat(created_value)
+        query = query.where(
+            or_(
+                created_col < created_value,
+                and_(created_col == created_value, Scan.id < cursor_id),
+            )
+        )
+
+    query = query.order_by(desc(created_col), desc(Scan.id))
+    if paginate:
+        query = query.limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    if paginate and len(rows) > limit:
+        rows = rows[:limit]
+        last, last_created = rows[-1]
+        if isinstance(last_created, datetime):
+            last_created = last_created.isoformat()
+        response.headers["X-Next-Cursor"] = _encode_cursor(last_created, last.id)
 
-    scans = query.order_by(desc(Scan.created_at)).all()
-    return [_serialize_scan(scan) for scan in scans]
+    return [_serialize_scan(scan, selected) for scan, _ in rows]
 
 
 @router.get("/{scan_id}")
-def get_scan(scan_id: int, db: Session = Depends(get_db)):
-    scan = db.query(Scan).filter(Scan.id == scan_id).first()
+async def get_scan(scan_id: int, db: AsyncSession = Depends(get_async_db)):
+    scan = await db.get(Scan, scan_id)
     if not scan:
         raise HTTPException(status_code=404, detail="Scan not found.")
     return _serialize_scan(scan)
@@ -254,7 +455,7 @@ def update_scan(
     scan_id: int,
     payload: ScanUpdate,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: Principal = Depends(get_current_user),
 ):
     scan = db.query(Scan).filter(Scan.id == scan_id).first()
     if not scan:
@@ -270,6 +471,7 @@ def update_scan(
 
     db.add(scan)
     db.commit()
+    dashboard_cache.invalidate()
     db.refresh(scan)
     return _serialize_scan(scan)
 
@@ -278,7 +480,7 @@ def update_scan(
 def delete_scan(
     scan_id: int,
     db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+    current: Principal = Depends(get_current_user),
 ):
     scan = db.query(Scan).filter(Scan.id == scan_id).first()
     if not scan:
@@ -297,4 +499,5 @@ def delete_scan(
 
     db.delete(scan)
     db.commit()
+    dashboard_cache.invalidate()
     return {"success": True}
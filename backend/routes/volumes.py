@@ -0,0 +1,232 @@
+import json
+import os
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session, load_only
+
+from backend.data.scan_database import get_db
+from backend.models.scan import Scan
+from backend.modules.result_cache import static_url_to_path
+from backend.modules.volume_transport import (
+    DTYPES,
+    PLANES,
+    VolumeInfo,
+    accepts_gzip,
+    encode,
+    encode_png,
+    iter_gzip,
+    iter_volume_bytes,
+    read_region,
+    read_slice,
+    volume_info,
+)
+
+router = APIRouter()
+
+STATIC_ROOT = os.path.realpath(os.path.join("backend", "static"))
+
+
+def _canonical_volume_path(scan: Scan) -> Optional[str]:
+    """
+    H5 written next to the scan's reconstruction: ai_result.canonical_volume_file
+    when the result was stored whole, else the .vti path with an .h5 suffix.
+    """
+    url = None
+    try:
+        url = (json.loads(scan.ai_result_json or "null") or {}).get("canonical_volume_file")
+    except (json.JSONDecodeError, AttributeError):
+        url = None
+    if not url and scan.file_path and scan.file_path.endswith(".vti"):
+        url = scan.file_path[: -len(".vti")] + ".h5"
+    if not url or not url.startswith("/static/"):
+        return None
+
+    path = os.path.realpath(static_url_to_path(url))
+    # Never serve anything outside backend/static
+    if not path.startswith(STATIC_ROOT + os.sep):
+        return None
+    return path
+
+
+def _load_volume(scan_id: int, dtype: str, db: Session) -> VolumeInfo:
+    if dtype not in DTYPES:
+        raise HTTPException(
+            status_code=400, detail=f"dtype must be one of: {', '.join(DTYPES)}."
+        )
+    scan = (
+        db.query(Scan)
+        .options(load_only(Scan.id, Scan.file_path, Scan.ai_result_json))
+        .filter(Scan.id == scan_id)
+        .first()
+    )
+    if not scan:
+        raise HTTPException(status_code=404, detail="Scan not found.")
+    path = _canonical_volume_path(scan)
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No reconstructed volume for this scan.")
+    return volume_info(path)
+
+
+def _parse_range(value: str, total: int) -> Optional[Tuple[int, int]]:
+    """Single 'bytes=a-b' / 'bytes=a-' / 'bytes=-n' range -> inclusive (start, end); None = ignore."""
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                raise ValueError
+            return max(total - length, 0), total - 1
+        start = int(first)
+        end = int(last) if last else total - 1
+    except ValueError:
+        raise HTTPException(status_code=416, detail="Invalid Range header.")
+    if start >= total or end < start:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable.",
+            headers={"Content-Range": f"bytes */{total}"},
+        )
+    return start, min(end, total - 1)
+
+
+@router.get("/{scan_id}/header")
+def get_volume_header(
+    scan_id: int,
+    dtype: str = "uint16",
+    db: Session = Depends(get_db),
+):
+    """Shape/spacing/quantisation needed to interpret GET /api/volumes/{scan_id}."""
+    info = _load_volume(scan_id, dtype, db)
+    return {**info.header(dtype), "url": f"/api/volumes/{scan_id}?dtype={dtype}"}
+
+
+@router.get("/{scan_id}")
+def get_volume(
+    scan_id: int,
+    request: Request,
+    dtype: str = "uint16",
+    db: Session = Depends(get_db),
+):
+    """
+    Streams the canonical volume as raw little-endian voxels, z-major, one
+    axial slab at a time. Supports single byte ranges (served unencoded) and
+    gzip Content-Encoding for full transfers.
+    """
+    info = _load_volume(scan_id, dtype, db)
+    header = info.header(dtype)
+    total = header["byte_length"]
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept-Encoding",
+        "X-Volume-Shape": ",".join(str(s) for s in info.shape),
+        "X-Volume-Spacing": ",".join(str(s) for s in info.spacing),
+        "X-Volume-Dtype": dtype,
+        "X-Volume-Scale": repr(header["scale"]),
+        "X-Volume-Offset": repr(header["offset"]),
+    }
+
+    byte_range = _parse_range(request.headers["range"], total) if "range" in request.headers else None
+    if byte_range is not None:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{total}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            iter_volume_bytes(info, dtype, start, end),
+            status_code=206,
+            media_type="application/octet-stream",
+            headers=headers,
+        )
+
+    body = iter_volume_bytes(info, dtype)
+    if accepts_gzip(request.headers.get("accept-encoding")):
+        headers["Content-Encoding"] = "gzip"
+        body = iter_gzip(body)
+    else:
+        headers["Content-Length"] = str(total)
+    return StreamingResponse(body, media_type="application/octet-stream", headers=headers)
+
+
+def _check_level(info: VolumeInfo, level: int) -> None:
+    if level not in info.factors:
+        raise HTTPException(
+            status_code=400,
+            detail=f"level must be one of: {', '.join(str(f) for f in info.factors)}.",
+        )
+
+
+def _raw_response(info: VolumeInfo, array, dtype: str, level: int) -> Response:
+    scale, offset = info.scale_offset(dtype)
+    return Response(
+        content=encode(array, dtype, scale, offset).tobytes(),
+        media_type="application/octet-stream",
+        headers={
+            "X-Region-Shape": ",".join(str(s) for s in array.shape),
+            "X-Volume-Spacing": ",".join(str(s * level) for s in info.spacing),
+            "X-Volume-Dtype": dtype,
+            "X-Volume-Scale": repr(scale),
+            "X-Volume-Offset": repr(offset),
+        },
+    )
+
+
+@router.get("/{scan_id}/slice")
+def get_volume_slice(
+    scan_id: int,
+    index: int,
+    plane: str = "axial",
+    level: int = 1,
+    image_format: str = Query("png", alias="format"),
+    dtype: str = "uint16",
+    db: Session = Depends(get_db),
+):
+    """
+    One axial/coronal/sagittal plane of pyramid level `level` (1, 2, 4, 8),
+    as an 8-bit PNG windowed to the study's range or as raw voxels.
+    """
+    if plane not in PLANES:
+        raise HTTPException(status_code=400, detail=f"plane must be one of: {', '.join(PLANES)}.")
+    if image_format not in ("png", "raw"):
+        raise HTTPException(status_code=400, detail="format must be 'png' or 'raw'.")
+    info = _load_volume(scan_id, dtype, db)
+    _check_level(info, level)
+
+    try:
+        plane_data = read_slice(info, plane, index, level)
+    except IndexError as exc:
+        raise HTTPException(status_code=416, detail=str(exc)) from exc
+
+    if image_format == "raw":
+        return _raw_response(info, plane_data, dtype, level)
+    return Response(content=encode_png(plane_data, info.low, info.high), media_type="image/png")
+
+
+@router.get("/{scan_id}/region")
+def get_volume_region(
+    scan_id: int,
+    z0: int,
+    z1: int,
+    y0: int,
+    y1: int,
+    x0: int,
+    x1: int,
+    level: int = 1,
+    dtype: str = "uint16",
+    db: Session = Depends(get_db),
+):
+    """
+    Raw voxels of the half-open box [z0:z1, y0:y1, x0:x1] in level
+    coordinates, clipped to the volume; X-Region-Shape gives the result shape.
+    """
+    info = _load_volume(scan_id, dtype, db)
+    _check_level(info, level)
+
+    try:
+        region = read_region(info, [(z0, z1), (y0, y1), (x0, x1)], level)
+    except IndexError as exc:
+        raise HTTPException(status_code=416, detail=str(exc)) from exc
+    return _raw_response(info, region, dtype, level)
@@ -0,0 +1,131 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+# -----------------------
+# Config
+# -----------------------
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "2048"))
+MAX_UPLOAD_BYTES = int(MAX_UPLOAD_MB * 1024 * 1024)
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_KB", "1024")) * 1024
+
+
+@dataclass
+class SavedUpload:
+    path: str
+    size: int
+    sha256: str
+    seconds: float
+
+    @property
+    def mb_per_second(self) -> float:
+        return (self.size / (1024 * 1024)) / self.seconds if self.seconds > 0 else 0.0
+
+
+class _UploadStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.uploads = 0
+        self.rejected = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def record(self, saved: SavedUpload) -> None:
+        with self._lock:
+            self.uploads += 1
+            self.bytes += saved.size
+            self.seconds += saved.seconds
+
+    def record_rejected(self) -> None:
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            mb = self.bytes / (1024 * 1024)
+            return {
+                "uploads": self.uploads,
+                "rejected": self.rejected,
+                "megabytes": round(mb, 2),
+                "mean_mb_per_second": round(mb / self.seconds, 2) if self.seconds else 0.0,
+                "max_upload_mb": MAX_UPLOAD_MB,
+                "chunk_kb": UPLOAD_CHUNK_BYTES // 1024,
+            }
+
+
+upload_stats = _UploadStats()
+
+
+def _too_large() -> HTTPException:
+    upload_stats.record_rejected()
+    return HTTPException(
+        status_code=413,
+        detail=f"Upload exceeds the {MAX_UPLOAD_MB:g} MB limit.",
+    )
+
+
+def _write_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+async def save_upload(upload: UploadFile, dest_path: str, max_bytes: int = MAX_UPLOAD_BYTES) -> SavedUpload:
+    """
+    Streams an upload to `dest_path` in fixed-size chunks while hashing it,
+    so memory stays flat whatever the file size. Raises 413 (and removes the
+    partial file) as soon as `max_bytes` is exceeded.
+    """
+    known_size = getattr(upload, "size", None)
+    if known_size is not None and known_size > max_bytes:
+        raise _too_large()
+
+    digest = hashlib.sha256()
+    size = 0
+    started = time.perf_counter()
+
+    try:
+        with open(dest_path, "wb") as out:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large()
+                await run_in_threadpool(_write_chunk, out, digest, chunk)
+    except BaseException:
+        try:
+            os.remove(dest_path)
+        except OSError:
+            pass
+        raise
+
+    saved = SavedUpload(
+        path=dest_path,
+        size=size,
+        sha256=digest.hexdigest(),
+        seconds=time.perf_counter() - started,
+    )
+    upload_stats.record(saved)
+    return saved
+
+
+async def upload_limit_middleware(request: Request, call_next):
+    """
+    Rejects oversized request bodies from their Content-Length header before
+    the multipart parser spools anything to disk.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+        upload_stats.record_rejected()
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Upload exceeds the {MAX_UPLOAD_MB:g} MB limit."},
+        )
+    return await call_next(request)
@@ -0,0 +1,130 @@
+"""
+Mixed read/write concurrency on SQLite with the plain create_engine defaults
+versus the tuned engine profile (WAL, synchronous=NORMAL, mmap, cache,
+busy_timeout). Readers run the dashboard aggregate; writers insert a scan
+and move it through processing -> predicted like the upload job does.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_db_concurrency --readers 8 --writers 2 --seconds 10
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend.data.scan_database import Base, build_engine
+from backend.models.doctor import Doctor  # noqa: F401
+from backend.models.patient import Patient
+from backend.models.scan import Scan
+from backend.models.user import User  # noqa: F401
+from backend.routes.dashboard import _compute_dashboard_stats
+
+
+def _seed(Session, patients: int, scans: int) -> None:
+    db = Session()
+    db.add_all(Patient(full_name=f"Patient {i}") for i in range(patients))
+    db.commit()
+    db.add_all(
+        Scan(
+            patient_id=1 + i % patients,
+            modality=("MRI", "XRAY")[i % 2],
+            file_path=f"/tmp/{i}",
+            status="predicted",
+            risk_level=("Low", "Medium", "High")[i % 3],
+        )
+        for i in range(scans)
+    )
+    db.commit()
+    db.close()
+
+
+def run(tuned: bool, readers: int, writers: int, seconds: float, scans: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        engine = build_engine(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}", tuned=tuned)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        _seed(Session, 200, scans)
+
+        deadline = time.perf_counter() + seconds
+        read_latencies, write_latencies = [], []
+        errors = {"locked": 0}
+        lock = threading.Lock()
+
+        def reader():
+            while time.perf_counter() < deadline:
+                db = Session()
+                started = time.perf_counter()
+                try:
+                    _compute_dashboard_stats(db)
+                    with lock:
+                        read_latencies.append(time.perf_counter() - started)
+                except OperationalError:
+                    with lock:
+                        errors["locked"] += 1
+                finally:
+                    db.close()
+
+        def writer():
+            while time.perf_counter() < deadline:
+                db = Session()
+                started = time.perf_counter()
+                try:
+                    scan = Scan(patient_id=1, modality="MRI", file_path="/tmp/new", status="processing")
+                    db.add(scan)
+                    db.commit()
+                    scan.status = "predicted"
+                    scan.ai_result_json = "{}" * 512
+                    db.commit()
+                    with lock:
+                        write_latencies.append(time.perf_counter() - started)
+                except OperationalError:
+                    db.rollback()
+                    with lock:
+                        errors["locked"] += 1
+                finally:
+                    db.close()
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        engine.dispose()
+
+    def p95(values):
+        return float(np.percentile(values, 95)) * 1000 if values else float("nan")
+
+    return {
+        "reads_per_s": len(read_latencies) / seconds,
+        "writes_per_s": len(write_latencies) / seconds,
+        "read_p95_ms": p95(read_latencies),
+        "write_p95_ms": p95(write_latencies),
+        "errors": errors["locked"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--scans", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'profile':>8} {'reads/s':>8} {'writes/s':>8} {'read p95 ms':>11} {'write p95 ms':>12} {'errors':>6}")
+    for label, tuned in (("default", False), ("tuned", True)):
+        r = run(tuned, args.readers, args.writers, args.seconds, args.scans)
+        print(
+            f"{label:>8} {r['reads_per_s']:>8.1f} {r['writes_per_s']:>8.1f} "
+            f"{r['read_p95_ms']:>11.1f} {r['write_p95_ms']:>12.1f} {r['errors']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
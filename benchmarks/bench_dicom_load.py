@@ -0,0 +1,124 @@
+"""
+Time-to-volume for DICOM series loading: the original sequential two-loop
+loader versus the parallel header/pixel pipeline in dicom_loader.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_dicom_load --slices 100 500 2000 --workers 1 4 8
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import zipfile
+from collections import defaultdict
+
+import numpy as np
+import pydicom
+from pydicom.dataset import FileDataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+from backend.modules.dicom_loader import load_dicom_series_from_zip
+
+
+def write_series(zip_path: str, n_slices: int, size: int = 256) -> None:
+    series_uid = generate_uid()
+    rng = np.random.default_rng(0)
+
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i in range(n_slices):
+            meta = FileMetaDataset()
+            meta.MediaStorageSOPClassUID = pydicom.uid.MRImageStorage
+            meta.MediaStorageSOPInstanceUID = generate_uid()
+            meta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+            ds = FileDataset(None, {}, file_meta=meta, preamble=b"\0" * 128)
+            ds.is_little_endian = True
+            ds.is_implicit_VR = False
+            ds.SeriesInstanceUID = series_uid
+            ds.SOPInstanceUID = meta.MediaStorageSOPInstanceUID
+            ds.InstanceNumber = i + 1
+            ds.ImagePositionPatient = [0.0, 0.0, float(i)]
+            ds.PixelSpacing = [0.9, 0.9]
+            ds.SliceThickness = 1.0
+            ds.Rows = ds.Columns = size
+            ds.SamplesPerPixel = 1
+            ds.PhotometricInterpretation = "MONOCHROME2"
+            ds.BitsAllocated = 16
+            ds.BitsStored = 16
+            ds.HighBit = 15
+            ds.PixelRepresentation = 0
+            ds.PixelData = rng.integers(0, 4096, (size, size), dtype=np.uint16).tobytes()
+
+            buffer = io.BytesIO()
+            pydicom.dcmwrite(buffer, ds)
+            zf.writestr(f"series/slice_{i:05d}.dcm", buffer.getvalue())
+
+
+def legacy_load(zip_path: str):
+    """The pre-parallel loader: extract, header loop, then pixel loop."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with zipfile.ZipFile(zip_path) as zf:
+            zf.extractall(tmpdir)
+
+        files = [
+            os.path.join(root, f)
+            for root, _, names in os.walk(tmpdir)
+            for f in names
+            if f.endswith(".dcm")
+        ]
+        series_map = defaultdict(list)
+        for path in files:
+            ds = pydicom.dcmread(path, stop_before_pixels=True, force=True)
+            series_map[ds.SeriesInstanceUID].append(path)
+
+        uid = max(series_map, key=lambda k: len(series_map[k]))
+        slices = defaultdict(list)
+        for path in series_map[uid]:
+            ds = pydicom.dcmread(path, force=True)
+            slices[float(ds.ImagePositionPatient[2])].append(ds.pixel_array.astype(np.float32))
+
+        zs = sorted(slices)
+        volume = np.stack([np.mean(slices[z], axis=0) for z in zs], axis=0)
+        return (volume - volume.min()) / (volume.max() - volume.min() + 1e-8)
+
+
+def timed(fn, repeats: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slices", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--size", type=int, default=256)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'slices':>7} {'loader':>18} {'seconds':>9} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.slices:
+            zip_path = os.path.join(workdir, f"series_{n}.zip")
+            write_series(zip_path, n, args.size)
+
+            baseline, reference = timed(lambda: legacy_load(zip_path), args.repeats)
+            print(f"{n:>7} {'legacy loop':>18} {baseline:>9.3f} {1.0:>8.2f}")
+
+            for workers in args.workers:
+                seconds, (volume, *_rest) = timed(
+                    lambda: load_dicom_series_from_zip(zip_path, workers=workers),
+                    args.repeats,
+                )
+                assert np.allclose(volume, reference, atol=1e-6), "volume mismatch"
+                label = f"parallel x{workers}"
+                print(f"{n:>7} {label:>18} {seconds:>9.3f} {baseline / seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Write/read throughput of the canonical HDF5 volume per codec: whole-volume
+write (with pyramid), full read, one axial slice, one 64^3 region and the
+1/4 pyramid level.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_h5_store --shape 160,512,512 --codecs lzf gzip blosc-lz4 none
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import h5py
+import numpy as np
+
+from backend.modules.volume_store import CODECS, level_dataset, save_volume
+
+
+def _timed(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _study(shape) -> np.ndarray:
+    """Smooth structure plus noise, closer to MRI compressibility than pure noise."""
+    rng = np.random.default_rng(0)
+    z, y, x = np.meshgrid(*(np.linspace(-1, 1, s, dtype=np.float32) for s in shape), indexing="ij")
+    body = np.clip(1.0 - (x ** 2 + y ** 2 + z ** 2), 0, None) * 1000
+    return (body + rng.normal(0, 20, shape).astype(np.float32)).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shape", default="160,512,512")
+    parser.add_argument("--codecs", nargs="+", default=list(CODECS))
+    parser.add_argument("--chunk", type=int, default=64)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    shape = tuple(int(v) for v in args.shape.split(","))
+    volume = _study(shape)
+    raw_mb = volume.nbytes / (1024 * 1024)
+    d, h, w = shape
+    print(f"volume {shape}, {raw_mb:.0f} MB float32, chunk {args.chunk}^3")
+    print(f"{'codec':>11} {'MB':>7} {'ratio':>6} {'write MB/s':>10} {'read MB/s':>9} "
+          f"{'slice ms':>8} {'64^3 ms':>8} {'1/4 ms':>7}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for codec in args.codecs:
+            path = os.path.join(tmpdir, f"{codec}.h5")
+            write_s = _timed(lambda: save_volume(path, volume, (1.0, 1.0, 1.0), "bench", codec=codec, chunk=args.chunk), 1)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+
+            with h5py.File(path, "r") as f:
+                full = level_dataset(f)
+                read_s = _timed(lambda: full[:], args.repeats)
+                slice_s = _timed(lambda: full[d // 2], args.repeats)
+                box_s = _timed(lambda: full[d // 2 - 32:d // 2 + 32, h // 2 - 32:h // 2 + 32, w // 2 - 32:w // 2 + 32], args.repeats)
+                quarter_s = _timed(lambda: level_dataset(f, 4)[:], args.repeats) if "pyramid" in f and "4" in f["pyramid"] else float("nan")
+
+            print(
+                f"{codec:>11} {size_mb:>7.1f} {raw_mb / size_mb:>6.2f} {raw_mb / write_s:>10.0f} "
+                f"{raw_mb / read_s:>9.0f} {slice_s * 1000:>8.1f} {box_s * 1000:>8.1f} {quarter_s * 1000:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
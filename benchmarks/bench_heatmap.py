@@ -0,0 +1,65 @@
+"""
+Heatmap latency per feature shape/size/colormap, split into rendering (on the
+request path) and encoding (on the writer thread), plus a check that importing
+the renderer does not pull in matplotlib.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_heatmap --sizes 256 750 --channels 1 32 --repeats 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from backend.modules.heatmap import COLORMAPS, render_heatmap, save_heatmap
+
+
+def _median_ms(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 750])
+    parser.add_argument("--formats", nargs="+", default=["png", "webp"])
+    # The U-Net's final conv has one channel; 32 covers a wider hooked layer
+    parser.add_argument("--channels", type=int, nargs="+", default=[1, 32])
+    parser.add_argument("--depth", type=int, default=128)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    if "matplotlib" in sys.modules:
+        raise SystemExit("matplotlib was imported by the heatmap renderer")
+
+    rng = np.random.default_rng(0)
+    d = args.depth
+    print(f"{'chans':>5} {'size':>5} {'colormap':>8} {'render ms':>9}  " + "  ".join(
+        f"{fmt + ' ms':>8} {'KB':>6}" for fmt in args.formats
+    ))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for channels in args.channels:
+            features = rng.standard_normal((1, channels, d, d, d), dtype=np.float32)
+            for size in args.sizes:
+                for colormap in COLORMAPS:
+                    render_ms = _median_ms(
+                        lambda: render_heatmap(features, size=size, colormap=colormap), args.repeats
+                    )
+                    rgb = render_heatmap(features, size=size, colormap=colormap)
+                    encoded = []
+                    for image_format in args.formats:
+                        path = os.path.join(tmpdir, f"heatmap.{image_format}")
+                        encode_ms = _median_ms(lambda: save_heatmap(rgb, path, image_format), args.repeats)
+                        encoded.append(f"{encode_ms:>8.1f} {os.path.getsize(path) / 1024:>6.1f}")
+                    print(f"{channels:>5} {size:>5} {colormap:>8} {render_ms:>9.1f}  " + "  ".join(encoded))
+
+
+if __name__ == "__main__":
+    main()
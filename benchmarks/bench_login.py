@@ -0,0 +1,57 @@
+"""
+Password verification throughput (the CPU cost of a login) at several PBKDF2
+round counts: logins/sec on one thread, on N threads, and per core.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_login --rounds 29000 100000 300000 --threads 4 --seconds 3
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.auth.security import make_context
+
+PASSWORD = "Shift-change-2024"
+
+
+def _throughput(context, password_hash: str, threads: int, seconds: float) -> float:
+    deadline = time.perf_counter() + seconds
+
+    def worker() -> int:
+        count = 0
+        while time.perf_counter() < deadline:
+            context.verify(PASSWORD, password_hash)
+            count += 1
+        return count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(lambda _: worker(), range(threads)))
+    return total / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, nargs="+", default=[29000, 100000, 300000])
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"{'rounds':>8} {'ms/login':>9} {'1 thread/s':>10} {f'{args.threads} threads/s':>12} {'per core/s':>10} {'rehash':>6}")
+    for rounds in args.rounds:
+        context = make_context(rounds)
+        password_hash = context.hash(PASSWORD)
+        single = _throughput(context, password_hash, 1, args.seconds)
+        parallel = _throughput(context, password_hash, args.threads, args.seconds)
+        # A hash made at the first cost setting is upgraded when the policy is higher
+        stale = make_context(args.rounds[0]).hash(PASSWORD)
+        print(
+            f"{rounds:>8} {1000 / single:>9.1f} {single:>10.1f} {parallel:>12.1f} "
+            f"{parallel / min(args.threads, cores):>10.1f} {str(context.needs_update(stale)):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Keyset pagination of GET /api/scans on SQLite: every page is checked against
+one ordered query, and page latency is reported.
+
+The seed mixes the created_at forms SQLite ends up holding: CURRENT_TIMESTAMP
+text ("YYYY-MM-DD HH:MM:SS"), SQLAlchemy-bound datetimes on a whole second
+("...SS.000000") and with microseconds, with many rows tied on the same
+instant, so a cursor that loses the stored form skips or repeats rows.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_scan_pagination --scans 2000 --limits 3 50 500
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi import Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.data.scan_database import Base, build_engine
+from backend.models.doctor import Doctor  # noqa: F401
+from backend.models.patient import Patient
+from backend.models.scan import Scan
+from backend.models.user import User  # noqa: F401
+from backend.routes.scans import list_scans
+
+
+def _seed(path: str, scans: int) -> None:
+    engine = build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    db.add(Patient(full_name="Patient 0"))
+    db.commit()
+
+    base = datetime(2025, 1, 1, 12, 0, 0)
+    rows = []
+    for i in range(scans):
+        # Groups of 4 share an instant; every third group sits on a whole second
+        group = i // 4
+        created_at = base + timedelta(seconds=group // 3, microseconds=(group % 3) * 250000)
+        rows.append(Scan(patient_id=1, modality="mri", file_path=f"/tmp/{i}", created_at=created_at))
+    db.add_all(rows)
+    db.commit()
+
+    # CURRENT_TIMESTAMP-style text, tied with the bound whole-second rows above
+    with engine.begin() as conn:
+        for i in range(max(4, scans // 10)):
+            conn.execute(
+                text(
+                    "INSERT INTO scans (patient_id, modality, file_path, status, risk_level, created_at) "
+                    "VALUES (1, 'mri', :path, 'predicted', 'Low', :created_at)"
+                ),
+                {"path": f"/tmp/ct{i}", "created_at": (base + timedelta(seconds=i % 5)).strftime("%Y-%m-%d %H:%M:%S")},
+            )
+    db.close()
+    engine.dispose()
+
+
+async def _page_all(Session, limit: int):
+    ids, latencies, cursor = [], [], None
+    while True:
+        async with Session() as db:
+            response = Response()
+            started = time.perf_counter()
+            page = await list_scans(
+                response, limit=limit, cursor=cursor, view="summary", db=db,
+                patient_id=None, doctor_id=None, modality=None, fields=None,
+            )
+            latencies.append(time.perf_counter() - started)
+        ids += [scan["id"] for scan in page]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return ids, latencies
+
+
+async def run(scans: int, limits) -> bool:
+    ok = True
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "bench.db")
+        _seed(path, scans)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with Session() as db:
+            expected = [
+                row[0]
+                for row in await db.execute(
+                    text("SELECT id FROM scans ORDER BY created_at DESC, id DESC")
+                )
+            ]
+
+        print(f"{'limit':>6} {'pages':>6} {'rows':>6} {'mean ms':>8} {'max ms':>8} {'parity':>6}")
+        for limit in limits:
+            ids, latencies = await _page_all(Session, limit)
+            page_ok = ids == expected
+            ok &= page_ok
+            print(
+                f"{limit:>6} {len(latencies):>6} {len(ids):>6} "
+                f"{1000 * sum(latencies) / len(latencies):>8.2f} {1000 * max(latencies):>8.2f} "
+                f"{'ok' if page_ok else 'FAIL':>6}"
+            )
+        await engine.dispose()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scans", type=int, default=2000)
+    parser.add_argument("--limits", type=int, nargs="+", default=[3, 50, 500])
+    args = parser.parse_args()
+
+    if not asyncio.run(run(args.scans, args.limits)):
+        raise SystemExit("Pagination check failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Latency of whole-volume slice classification (MRI_CLASSIFY_MODE=volume) for
+a given study depth across batch sizes, strides and torch thread counts.
+
+Needs the MRI classifier weights (or MRI_CLASSIFIER_BACKEND=ort with an
+exported graph).
+
+Usage (from the repo root):
+    python -m benchmarks.bench_slice_classify --depth 150 --batch-sizes 8 32 64 --threads 1 4
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from backend.modules.model_registry import registry
+from backend.modules.mri_analysis import classify_volume, slice_indices
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--depth", type=int, default=150)
+    parser.add_argument("--size", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--strides", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    volume = np.random.default_rng(0).random((args.depth, args.size, args.size), dtype=np.float32)
+    registry.warm_up()
+
+    print(f"{'threads':>7} {'stride':>6} {'batch':>5} {'slices':>6} {'seconds':>8} {'ms/slice':>8}")
+    for threads in args.threads:
+        torch.set_num_threads(threads)
+        for stride in args.strides:
+            count = len(slice_indices(args.depth, stride, max_slices=0))
+            for batch_size in args.batch_sizes:
+                best = float("inf")
+                for _ in range(args.repeats):
+                    started = time.perf_counter()
+                    classify_volume(volume, batch_size=batch_size, stride=stride, max_slices=0)
+                    best = min(best, time.perf_counter() - started)
+                print(
+                    f"{threads:>7} {stride:>6} {batch_size:>5} {count:>6} "
+                    f"{best:>8.2f} {best / count * 1000:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Memory/latency of 3D reconstruction: the 128^3 resample path versus tiled
+sliding-window inference at native resolution.
+
+Each configuration runs in a fresh process so peak RSS is measured per run.
+Before timing, tiled inference is checked against whole-volume inference
+with a small pointwise conv net, where both must agree exactly.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_tiled_recon --shapes 128,256,256 192,512,512 --tiles 48 64 96
+"""
+import argparse
+import multiprocessing
+import os
+import queue as queue_module
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+# Seconds to wait for one configuration before reporting it as hung
+RUN_TIMEOUT = float(os.getenv("BENCH_RUN_TIMEOUT", "1800"))
+PARITY_TOLERANCE = 1e-5
+
+
+def check_parity(shape=(40, 70, 52), tile=(32, 32, 32), overlap=0.25) -> float:
+    """
+    Max abs difference between tiled and whole-volume output of a 1x1x1
+    conv net (no spatial context, so any difference is a tiling bug). The
+    shape is not a multiple of the tile and is smaller than it along one
+    axis to exercise padding and the flush last tile.
+    """
+    import torch
+
+    from backend.modules.tiling import sliding_window_inference
+
+    torch.manual_seed(0)
+    net = torch.nn.Sequential(
+        torch.nn.Conv3d(1, 4, 1), torch.nn.ReLU(), torch.nn.Conv3d(4, 1, 1)
+    ).eval()
+
+    def forward(x):
+        out = net(x)
+        return out, torch.cat([out, x], dim=1)
+
+    volume = np.random.default_rng(0).random(shape, dtype=np.float32)
+    output, features = sliding_window_inference(volume, forward, tile_size=tile, overlap=overlap)
+    with torch.no_grad():
+        expected, expected_features = forward(torch.from_numpy(volume)[None, None])
+    if output.shape != shape or features.shape != (2,) + shape:
+        return float("inf")
+    return max(
+        float(np.abs(output - expected[0, 0].numpy()).max()),
+        float(np.abs(features - expected_features[0].numpy()).max()),
+    )
+
+
+def _run(mode: str, shape, tile: int, overlap: float, queue) -> None:
+    import torch
+
+    from backend.modules.mri_service import AIReconstructionEngine
+
+    torch.set_num_threads(int(os.getenv("BENCH_THREADS", "4")))
+    engine = AIReconstructionEngine()
+    volume = np.random.default_rng(0).random(shape, dtype=np.float32)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        heatmap_path = os.path.join(tmpdir, "heatmap.png")
+        started = time.perf_counter()
+        if mode == "tiled":
+            output, _ = engine.analyze_volume_tiled(
+                volume, heatmap_path, tile_size=(tile, tile, tile), overlap=overlap
+            )
+        else:
+            output, _ = engine.analyze_volume(
+                volume, target_shape=(128, 128, 128), heatmap_path=heatmap_path, mode="resample"
+            )
+        seconds = time.perf_counter() - started
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({
+        "seconds": seconds,
+        "peak_mb": peak_kb / 1024,
+        "delta_mb": (peak_kb - baseline_kb) / 1024,
+        "output_shape": tuple(output.shape),
+    })
+
+
+def measure(mode: str, shape, tile: int = 0, overlap: float = 0.25) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(mode, shape, tile, overlap, queue))
+    proc.start()
+    try:
+        # Poll so a child that dies without reporting is noticed straight away
+        deadline = time.monotonic() + RUN_TIMEOUT
+        while True:
+            try:
+                return queue.get(timeout=1.0)
+            except queue_module.Empty:
+                if not proc.is_alive():
+                    raise RuntimeError(f"{mode} run on {shape} exited with code {proc.exitcode}")
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{mode} run on {shape} timed out after {RUN_TIMEOUT:.0f}s")
+    finally:
+        if proc.is_alive():
+            proc.terminate()
+        proc.join()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shapes", nargs="+", default=["128,256,256", "192,512,512"])
+    parser.add_argument("--tiles", type=int, nargs="+", default=[48, 64, 96])
+    parser.add_argument("--overlap", type=float, default=0.25)
+    args = parser.parse_args()
+
+    error = check_parity()
+    print(f"tiled vs whole-volume max abs error: {error:.2e}")
+    if error > PARITY_TOLERANCE:
+        raise SystemExit("Parity check failed")
+
+    print(f"{'volume':>14} {'mode':>12} {'seconds':>9} {'peak MB':>9} {'+MB':>8} {'output':>16}")
+    for text in args.shapes:
+        shape = tuple(int(v) for v in text.split(","))
+        runs = [("resample 128", measure("resample", shape))]
+        for tile in args.tiles:
+            runs.append((f"tiled {tile}", measure("tiled", shape, tile, args.overlap)))
+
+        for label, r in runs:
+            print(
+                f"{text:>14} {label:>12} {r['seconds']:>9.2f} {r['peak_mb']:>9.0f} "
+                f"{r['delta_mb']:>8.0f} {str(r['output_shape']):>16}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Size and write time of the reconstruction .vti: the previous writer
+(transpose + deep copy, uncompressed float32) against compressed appended
+binary with optional quantisation.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_vti_write --shape 128,128,128 --repeats 3
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+from backend.modules.mri_service import save_vtk_volume
+
+
+def save_vtk_volume_legacy(volume: np.ndarray, spacing, output_path: str) -> None:
+    """The writer before compression: transposed deep copy, default (inline) float32."""
+    depth, height, width = volume.shape
+    image_data = vtk.vtkImageData()
+    image_data.SetDimensions(width, height, depth)
+    image_data.SetSpacing(spacing[2], spacing[1], spacing[0])
+    volume_vtk = np.ascontiguousarray(np.transpose(volume, (2, 1, 0)), dtype=np.float32)
+    vtk_array = numpy_support.numpy_to_vtk(volume_vtk.ravel(order="C"), deep=True, array_type=vtk.VTK_FLOAT)
+    vtk_array.SetName("Scalars")
+    image_data.GetPointData().SetScalars(vtk_array)
+    writer = vtk.vtkXMLImageDataWriter()
+    writer.SetFileName(output_path)
+    writer.SetInputData(image_data)
+    writer.SetCompressorTypeToNone()
+    writer.Write()
+
+
+def _reconstruction(shape) -> np.ndarray:
+    """Smooth blob with the engine's < 0.15 zeroing, so most voxels are zero like real output."""
+    z, y, x = np.meshgrid(*(np.linspace(-1, 1, s, dtype=np.float32) for s in shape), indexing="ij")
+    volume = np.exp(-4 * (x ** 2 + y ** 2 + z ** 2)).astype(np.float32)
+    volume += np.random.default_rng(0).normal(0, 0.02, shape).astype(np.float32)
+    volume[volume < 0.15] = 0
+    return volume
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shape", default="128,128,128")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    shape = tuple(int(v) for v in args.shape.split(","))
+    volume = _reconstruction(shape)
+    spacing = (1.0, 1.0, 1.0)
+    print(f"volume {shape}, {np.mean(volume == 0) * 100:.0f}% zeros")
+
+    configs = [("legacy", None, None)] + [
+        (f"{compressor} {dtype}", compressor, dtype)
+        for compressor in ("zlib", "lz4", "none")
+        for dtype in ("float32", "uint16", "uint8")
+    ]
+
+    print(f"{'writer':>16} {'KB':>9} {'ms':>8}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "volume.vti")
+        for label, compressor, dtype in configs:
+            best = float("inf")
+            for _ in range(args.repeats):
+                started = time.perf_counter()
+                if compressor is None:
+                    save_vtk_volume_legacy(volume, spacing, path)
+                else:
+                    save_vtk_volume(volume, spacing, path, dtype=dtype, compressor=compressor)
+                best = min(best, time.perf_counter() - started)
+            print(f"{label:>16} {os.path.getsize(path) / 1024:>9.0f} {best * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
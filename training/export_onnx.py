@@ -0,0 +1,104 @@
+"""
+Exports the served networks to ONNX for the ONNX Runtime backend.
+
+Usage (from the repo root):
+    python -m training.export_onnx                      # all models
+    python -m training.export_onnx --models xray mri_classifier
+
+Graphs are written to backend/models/onnx/<name>.onnx and picked up when
+<NAME>_BACKEND=ort (or INFERENCE_BACKEND=ort) is set.
+"""
+import argparse
+import json
+import os
+
+import torch
+import torch.nn as nn
+
+from backend.modules.inference_backend import ONNX_DIR, onnx_path
+
+OPSET = 17
+
+
+class _WithFeatures(nn.Module):
+    """Exposes the pre-sigmoid `final` activations as a second output for Grad-CAM."""
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x):
+        s1 = self.model.enc1(x)
+        features = self.model.final(s1)
+        return torch.sigmoid(features), features
+
+
+def _build(name: str):
+    """Returns (torch module, example input, output names, dynamic axes, metadata)."""
+    batch_axes = {"input": {0: "batch"}, "output": {0: "batch"}}
+
+    if name == "xray":
+        from backend.modules.xray_service import _build_xray_model
+        return _build_xray_model(), torch.zeros(1, 3, 224, 224), ["output"], batch_axes, {}
+
+    if name == "mri_classifier":
+        from backend.modules.mri_analysis import _build_cls_model
+        model = _build_cls_model()
+        meta = {"class_names": json.dumps(model.class_names)}
+        return model, torch.zeros(1, 3, 224, 224), ["output"], batch_axes, meta
+
+    if name == "mri_segmenter":
+        from backend.modules.mri_analysis import IMAGE_SIZE, _build_seg_model
+        return _build_seg_model(), torch.zeros(1, 1, IMAGE_SIZE, IMAGE_SIZE), ["output"], batch_axes, {}
+
+    if name == "mri_reconstructor":
+        from backend.modules.mri_service import RECON_SIZE, UNet3DReconstructor
+        spatial = {0: "batch", 2: "depth", 3: "height", 4: "width"}
+        axes = {"input": spatial, "output": spatial, "features": spatial}
+        example = torch.zeros(1, 1, RECON_SIZE, RECON_SIZE, RECON_SIZE)
+        return _WithFeatures(UNet3DReconstructor().eval()), example, ["output", "features"], axes, {}
+
+    raise SystemExit(f"Unknown model '{name}'.")
+
+
+def export(name: str) -> str:
+    model, example, output_names, dynamic_axes, metadata = _build(name)
+    path = onnx_path(name)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model.eval(),
+            (example,),
+            path,
+            input_names=["input"],
+            output_names=output_names,
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET,
+        )
+
+    if metadata:
+        import onnx
+
+        graph = onnx.load(path)
+        for key, value in metadata.items():
+            entry = graph.metadata_props.add()
+            entry.key, entry.value = key, value
+        onnx.save(graph, path)
+
+    return path
+
+
+def main():
+    names = ["xray", "mri_classifier", "mri_segmenter", "mri_reconstructor"]
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", nargs="+", choices=names, default=names)
+    args = parser.parse_args()
+
+    os.makedirs(ONNX_DIR, exist_ok=True)
+    for name in args.models:
+        path = export(name)
+        print(f"Exported {name}: {path} ({os.path.getsize(path) / (1024 * 1024):.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
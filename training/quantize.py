@@ -0,0 +1,139 @@
+"""
+Calibrates INT8 versions of the ResNet18 classifiers and writes a report
+comparing them with the fp32 models.
+
+Usage (from the repo root):
+    python -m training.quantize --model xray --images data/xray/val
+    python -m training.quantize --model mri_classifier --images data/brisc/val
+
+The calibration folder is searched recursively for images. The first
+--calibration-count images calibrate the observers; the rest are held out to
+measure agreement with fp32. Output:
+    backend/models/<weights>_int8.pt          (TorchScript, loaded when <MODEL>_PRECISION=int8)
+    backend/models/<weights>_int8_report.json
+"""
+import argparse
+import json
+import os
+import random
+
+import torch
+from PIL import Image
+
+from backend.modules.quantization import (
+    file_size_mb,
+    int8_path,
+    measure_latency,
+    quantize_dynamic,
+    quantize_static,
+    save_quantized,
+)
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp"}
+
+
+def load_fp32(model_name: str):
+    """Returns (fp32 model, weights path, preprocessing transform, class names)."""
+    if model_name == "xray":
+        from backend.modules.xray_service import XRAY_MODEL_PATH, transform
+        from backend.models.cnn_model import XRayCNN
+
+        model = XRayCNN()
+        model.load_state_dict(torch.load(XRAY_MODEL_PATH, map_location="cpu", weights_only=True))
+        return model.eval(), XRAY_MODEL_PATH, transform, None
+
+    if model_name == "mri_classifier":
+        from backend.models.classifier import MRIDiseaseClassifier
+        from backend.modules.mri_analysis import CLS_MODEL_PATH, cls_transform
+
+        ckpt = torch.load(CLS_MODEL_PATH, map_location="cpu", weights_only=True)
+        model = MRIDiseaseClassifier(num_classes=len(ckpt["classes"]))
+        model.load_state_dict(ckpt["model_state"])
+        return model.eval(), CLS_MODEL_PATH, cls_transform, list(ckpt["classes"])
+
+    raise SystemExit(f"Unknown model '{model_name}'. Use 'xray' or 'mri_classifier'.")
+
+
+def find_images(root: str):
+    paths = []
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.join(dirpath, name))
+    return sorted(paths)
+
+
+def batches(paths, transform, batch_size):
+    for start in range(0, len(paths), batch_size):
+        chunk = paths[start:start + batch_size]
+        yield torch.stack([transform(Image.open(p).convert("L")) for p in chunk])
+
+
+def predictions(model, paths, transform, binary: bool):
+    labels = []
+    with torch.no_grad():
+        for batch in batches(paths, transform, 32):
+            logits = model(batch)
+            if binary:
+                labels.extend((torch.sigmoid(logits.view(-1)) >= 0.5).long().tolist())
+            else:
+                labels.extend(logits.argmax(dim=1).tolist())
+    return labels
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True, choices=["xray", "mri_classifier"])
+    parser.add_argument("--images", required=True, help="Held-out image folder")
+    parser.add_argument("--calibration-count", type=int, default=200)
+    parser.add_argument("--mode", choices=["static", "dynamic"], default="static")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    model, weights_path, transform, class_names = load_fp32(args.model)
+    binary = args.model == "xray"
+
+    paths = find_images(args.images)
+    if len(paths) <= args.calibration_count:
+        raise SystemExit(
+            f"Need more than {args.calibration_count} images in {args.images} "
+            f"(found {len(paths)}) to hold some out for evaluation."
+        )
+    random.Random(args.seed).shuffle(paths)
+    calibration, held_out = paths[:args.calibration_count], paths[args.calibration_count:]
+
+    example = torch.zeros(1, 3, 224, 224)
+    if args.mode == "static":
+        quantized = quantize_static(model, batches(calibration, transform, 16), example)
+    else:
+        quantized = quantize_dynamic(model)
+
+    out_path = int8_path(weights_path)
+    save_quantized(quantized, example, out_path, class_names)
+
+    fp32_labels = predictions(model, held_out, transform, binary)
+    int8_labels = predictions(quantized, held_out, transform, binary)
+    agreement = sum(a == b for a, b in zip(fp32_labels, int8_labels)) / len(held_out)
+
+    report = {
+        "model": args.model,
+        "mode": args.mode,
+        "calibration_images": len(calibration),
+        "held_out_images": len(held_out),
+        "agreement_with_fp32": round(agreement, 4),
+        "size_mb": {"fp32": file_size_mb(weights_path), "int8": file_size_mb(out_path)},
+        "threads": torch.get_num_threads(),
+        "fp32": [measure_latency(model, torch.zeros(b, 3, 224, 224)) for b in (1, 8, 32)],
+        "int8": [measure_latency(quantized, torch.zeros(b, 3, 224, 224)) for b in (1, 8, 32)],
+    }
+
+    report_path = out_path.replace(".pt", "_report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report, indent=2))
+    print(f"Saved {out_path} and {report_path}")
+
+
+if __name__ == "__main__":
+    main()